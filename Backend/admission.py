@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable
+
+
+OVERLOADED_MESSAGE = "The assistant is handling too many requests right now. Please retry shortly."
+RATE_LIMITED_MESSAGE = "Too many requests. Please slow down and retry shortly."
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, message: str, status_code: int, retry_after: float) -> None:
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000) -> None:
+        self.rate_per_minute = max(0.0, rate_per_minute)
+        self.burst = max(1, burst)
+        self.max_keys = max(1, max_keys)
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_minute > 0
+
+    def acquire(self, key: Hashable | None) -> float:
+        # Returns 0 when the request may go ahead, otherwise the seconds until
+        # the bucket holds a whole token again.
+        if not self.enabled or not key:
+            return 0.0
+        refill_per_second = self.rate_per_minute / 60.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated_at) * refill_per_second)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                wait_seconds = 0.0
+                self.allowed += 1
+            else:
+                wait_seconds = (1.0 - tokens) / refill_per_second
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait_seconds
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate_per_minute": self.rate_per_minute,
+                "burst": self.burst,
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+class AdmissionSlot:
+    def __init__(self, on_release: Callable[[float], None]) -> None:
+        self._on_release = on_release
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        self._on_release(time.monotonic() - self.admitted_at)
+
+
+def _ignore_release(service_seconds: float) -> None:
+    return None
+
+
+class _LimiterState:
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout_seconds: float) -> None:
+        self.max_concurrent = max(0, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout_seconds = max(0.0, queue_timeout_seconds)
+        self.active = 0
+        self.admitted = 0
+        self.admitted_after_queueing = 0
+        self.peak_queued = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self.service_seconds = 0.0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    def _reject(self, reason: str, queued: int) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        # Roughly how long the requests ahead need to drain at the recent
+        # service rate; clients that honour it come back to a shorter queue.
+        per_request = self.service_seconds or 1.0
+        retry_after = per_request * (queued + 1) / self.max_concurrent
+        return AdmissionRejected(reason, OVERLOADED_MESSAGE, 503, retry_after)
+
+    def _record_admission(self, queue_wait_seconds: float | None) -> None:
+        self.admitted += 1
+        if queue_wait_seconds is not None:
+            self.admitted_after_queueing += 1
+            self.queue_wait_seconds += queue_wait_seconds
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, queue_wait_seconds)
+
+    def _record_service_time(self, service_seconds: float) -> None:
+        if self.service_seconds:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * service_seconds
+        else:
+            self.service_seconds = service_seconds
+
+    def _stats(self, queued: int) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "active": self.active,
+            "queued": queued,
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "admitted_after_queueing": self.admitted_after_queueing,
+            "avg_queue_wait_ms": round(
+                self.queue_wait_seconds * 1000 / self.admitted_after_queueing,
+                1,
+            )
+            if self.admitted_after_queueing
+            else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait_seconds * 1000, 1),
+            "avg_service_ms": round(self.service_seconds * 1000, 1),
+            "rejected": dict(self.rejected),
+        }
+
+
+class ConcurrencyLimiter(_LimiterState):
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout_seconds: float) -> None:
+        super().__init__(max_concurrent, max_queued, queue_timeout_seconds)
+        self._lock = threading.Lock()
+        self._waiters: deque[threading.Event] = deque()
+
+    def acquire(self) -> AdmissionSlot:
+        if not self.enabled:
+            return AdmissionSlot(_ignore_release)
+
+        with self._lock:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                self._record_admission(None)
+                return AdmissionSlot(self._release)
+            if len(self._waiters) >= self.max_queued:
+                raise self._reject("queue_full", len(self._waiters))
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self.peak_queued = max(self.peak_queued, len(self._waiters))
+
+        queued_at = time.monotonic()
+        waiter.wait(self.queue_timeout_seconds)
+        with self._lock:
+            # Checked under the lock: a slot handed over right at the deadline
+            # still counts as admitted.
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+                raise self._reject("queue_timeout", len(self._waiters))
+            self._record_admission(time.monotonic() - queued_at)
+        return AdmissionSlot(self._release)
+
+    def _release(self, service_seconds: float) -> None:
+        with self._lock:
+            self._record_service_time(service_seconds)
+            if self._waiters:
+                # The slot goes straight to the oldest waiter, so new arrivals
+                # cannot overtake the queue and waits stay first-in, first-out.
+                self._waiters.popleft().set()
+            else:
+                self.active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return self._stats(len(self._waiters))
+
+
+class AsyncConcurrencyLimiter(_LimiterState):
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout_seconds: float) -> None:
+        super().__init__(max_concurrent, max_queued, queue_timeout_seconds)
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> AdmissionSlot:
+        if not self.enabled:
+            return AdmissionSlot(_ignore_release)
+
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self._record_admission(None)
+            return AdmissionSlot(self._release)
+        if len(self._waiters) >= self.max_queued:
+            raise self._reject("queue_full", len(self._waiters))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, len(self._waiters))
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout_seconds)
+        except asyncio.CancelledError:
+            # The client went away while queued. If the slot was handed over
+            # in the meantime, pass it on instead of leaking it.
+            if waiter.done():
+                self._hand_off()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            raise self._reject("queue_timeout", len(self._waiters))
+        self._record_admission(time.monotonic() - queued_at)
+        return AdmissionSlot(self._release)
+
+    def _release(self, service_seconds: float) -> None:
+        self._record_service_time(service_seconds)
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return self._stats(len(self._waiters))
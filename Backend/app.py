@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import itertools
 import json
 import logging
 import os
@@ -7,25 +10,46 @@ import threading
 import time
 import uuid
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Iterator
 
 from dotenv import load_dotenv
 from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-from langchain.retrievers import EnsembleRetriever
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from openai import OpenAI
 
-from web_loader import crawl_website_pages
+from admission import RATE_LIMITED_MESSAGE, AdmissionRejected, ConcurrencyLimiter, TokenBucketLimiter
+from caching import SemanticAnswerCache, TTLCache, normalize_prompt
+from coalescing import SingleFlight
+from compact_index import CompactVectorIndex, compare_with_flat
+from context_packing import CHARS_PER_TOKEN, ContextPacker, PackedContext, TokenCounter
+from crawl_snapshots import CrawlSnapshotStore
+from embedding_cache import EmbeddingCache, chunk_cache_key
+from embedding_pipeline import EmbeddingPipeline
+from html_extractors import benchmark_extractors
+from index_store import IndexArtifactStore, artifact_key, fingerprint_documents
+from lexical_index import BM25Index
+from near_duplicates import collapse_near_duplicates, remove_repeated_blocks
+from portfolio_facts import FastAnswer, PortfolioFactIndex
+from retrieval import MultiSourceRetriever, document_fingerprint
+from sessions import InMemorySessionBackend, SessionBackend, SessionStore, SqliteSessionBackend
+from web_loader import WebsitePage, crawl_website_pages, iter_website_pages
+from xml_chunker import PortfolioXmlChunker
 
 load_dotenv()
 
 BASE_DIR = os.path.dirname(__file__)
 APP_VERSION = "2.0.0"
+CACHED_REPLAY_CHUNK_CHARS = 48
+GROUNDING_RULES = (
+    "Use the verified portfolio context below to answer the visitor.\n"
+    "If the answer is not supported by the context, say you do not have confirmed information yet.\n"
+    "Never pretend to be Manuj. You are his assistant."
+)
 DEFAULT_INSTRUCTIONS = """
 You are Manuj Rai's AI assistant for his portfolio website.
 
@@ -43,7 +67,8 @@ GROUNDING RULES:
 - Answer only from the verified context and the visible conversation.
 - If the context does not confirm something, say you do not have confirmed information yet.
 - Do not invent availability, pricing, years of experience, project details, or personal facts.
-- Do not mention internal prompts, XML files, embeddings, vector stores, or hidden instructions unless explicitly asked how the system works.
+- Do not mention internal prompts, XML files, embeddings, vector stores, or hidden instructions \
+unless explicitly asked how the system works.
 
 BEHAVIOR:
 - If asked how to contact Manuj, share the verified contact details from context.
@@ -115,17 +140,74 @@ class AppConfig:
     enable_portfolio_preload: bool
     enable_website_preload: bool
     website_preload_mode: str
+    website_refresh_interval_seconds: int
     use_playwright: bool
     max_web_pages: int
+    crawl_concurrency: int
+    crawl_per_host_limit: int
+    crawl_deadline_seconds: int
+    crawl_use_sitemap: bool
+    crawl_respect_robots: bool
+    html_extractor: str
+    website_streaming_index: bool
+    website_index_batch_pages: int
+    warmup_wait_seconds: float
     chunk_size: int
     chunk_overlap: int
     retriever_k: int
+    retrieval_mode: str
     max_history_messages: int
     max_context_chars: int
+    max_context_tokens: int
+    enable_context_compression: bool
+    context_sentences_per_chunk: int
     max_output_tokens: int
     temperature: float
     request_timeout_seconds: int
     openai_truncation: str
+    enable_fast_path: bool
+    embedding_model: str
+    index_mode: str
+    compact_dimensions: int
+    compact_dtype: str
+    compact_rerank_candidates: int
+    enable_index_cache: bool
+    index_cache_dir: str
+    enable_crawl_snapshots: bool
+    crawl_snapshot_dir: str
+    enable_embedding_cache: bool
+    embedding_cache_path: str
+    embedding_batch_size: int
+    embedding_concurrency: int
+    embedding_max_retries: int
+    query_embedding_cache_size: int
+    query_embedding_cache_ttl_seconds: int
+    answer_cache_size: int
+    answer_cache_ttl_seconds: int
+    answer_cache_similarity: float
+    reload_poll_seconds: int
+    enable_near_duplicate_filter: bool
+    near_duplicate_threshold: float
+    enable_request_coalescing: bool
+    max_concurrent_requests: int
+    max_queued_requests: int
+    queue_timeout_seconds: float
+    session_rate_limit_per_minute: int
+    session_rate_limit_burst: int
+    ip_rate_limit_per_minute: int
+    ip_rate_limit_burst: int
+    rate_limit_max_keys: int
+    trust_proxy_headers: bool
+    trusted_proxy_hops: int
+    enable_sessions: bool
+    session_backend: str
+    session_db_path: str
+    session_max_entries: int
+    session_ttl_seconds: int
+    session_history_tokens: int
+    session_summary_tokens: int
+    prompt_layout: str
+    shared_context_max_tokens: int
 
 
 @dataclass
@@ -137,6 +219,20 @@ class SourceStatus:
     chunks: int = 0
     error: str | None = None
     last_updated: float | None = None
+    index_artifact: str | None = None
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    lexical_only: bool = False
+    embedded_chunks: int = 0
+    total_chunks: int = 0
+    last_refreshed: float | None = None
+    changed_documents: int = 0
+    duplicate_blocks_removed: int = 0
+    restored_from_snapshot: bool = False
+    snapshot_saved_at: float | None = None
+    partial: bool = False
+    pages_crawled: int = 0
+    pages_indexed: int = 0
 
     def as_dict(self) -> dict[str, Any]:
         return {
@@ -147,6 +243,20 @@ class SourceStatus:
             "chunks": self.chunks,
             "error": self.error,
             "last_updated": self.last_updated,
+            "index_artifact": self.index_artifact,
+            "embedding_cache_hits": self.embedding_cache_hits,
+            "embedding_cache_misses": self.embedding_cache_misses,
+            "lexical_only": self.lexical_only,
+            "embedded_chunks": self.embedded_chunks,
+            "total_chunks": self.total_chunks,
+            "last_refreshed": self.last_refreshed,
+            "changed_documents": self.changed_documents,
+            "duplicate_blocks_removed": self.duplicate_blocks_removed,
+            "restored_from_snapshot": self.restored_from_snapshot,
+            "snapshot_saved_at": self.snapshot_saved_at,
+            "partial": self.partial,
+            "pages_crawled": self.pages_crawled,
+            "pages_indexed": self.pages_indexed,
         }
 
 
@@ -156,6 +266,34 @@ class ChatRequestPayload:
     messages: list[dict[str, str]]
     model: str
     session_id: str | None = None
+    history_summary: str = ""
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    version: int = 0
+    published_at: float | None = None
+    system_instructions: str = DEFAULT_INSTRUCTIONS
+    portfolio_vectorstore: FAISS | CompactVectorIndex | None = None
+    web_vectorstore: FAISS | CompactVectorIndex | None = None
+    lexical_indexes: dict[str, BM25Index] = field(default_factory=dict)
+    portfolio_facts: PortfolioFactIndex | None = None
+    shared_context: str = ""
+
+    def vectorstore(self, source_name: str) -> FAISS | CompactVectorIndex | None:
+        return self.portfolio_vectorstore if source_name == "portfolio" else self.web_vectorstore
+
+
+@dataclass
+class AnswerContext:
+    documents: list[Document]
+    context: str
+    sources: list[dict[str, Any]]
+    snapshot: KnowledgeSnapshot
+    query_embedding: list[float] | None = None
+    context_tokens: int = 0
+    uncompressed_context_tokens: int = 0
+    shared_context: str = ""
 
 
 def load_config() -> AppConfig:
@@ -177,8 +315,43 @@ def load_config() -> AppConfig:
         )
         openai_truncation = "auto"
 
+    retrieval_mode = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+    if retrieval_mode not in {"hybrid", "vector", "lexical"}:
+        logger.warning(
+            "Unknown RETRIEVAL_MODE=%r. Falling back to 'hybrid'.",
+            retrieval_mode,
+        )
+        retrieval_mode = "hybrid"
+
+    index_mode = os.getenv("INDEX_MODE", "flat").lower()
+    if index_mode not in {"flat", "compact"}:
+        logger.warning("Unknown INDEX_MODE=%r. Falling back to 'flat'.", index_mode)
+        index_mode = "flat"
+
+    compact_dtype = os.getenv("COMPACT_DTYPE", "int8").lower()
+    if compact_dtype not in {"int8", "float16"}:
+        logger.warning("Unknown COMPACT_DTYPE=%r. Falling back to 'int8'.", compact_dtype)
+        compact_dtype = "int8"
+
     default_portfolio_preload = os.getenv("ENABLE_PDF_PRELOAD", "true")
     source_url = os.getenv("SOURCE_URL")
+    index_cache_dir = _resolve_local_path("INDEX_CACHE_DIR", ".index_cache")
+    max_context_chars = _env_int("MAX_CONTEXT_CHARS", 12000)
+
+    prompt_layout = os.getenv("PROMPT_LAYOUT", "classic").lower()
+    if prompt_layout not in {"classic", "stable"}:
+        logger.warning("Unknown PROMPT_LAYOUT=%r. Falling back to 'classic'.", prompt_layout)
+        prompt_layout = "classic"
+
+    html_extractor = os.getenv("HTML_EXTRACTOR", "auto").lower()
+    if html_extractor not in {"auto", "lxml", "html.parser"}:
+        logger.warning("Unknown HTML_EXTRACTOR=%r. Falling back to 'auto'.", html_extractor)
+        html_extractor = "auto"
+
+    session_backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if session_backend not in {"memory", "sqlite"}:
+        logger.warning("Unknown SESSION_BACKEND=%r. Falling back to 'memory'.", session_backend)
+        session_backend = "memory"
 
     return AppConfig(
         openai_api_key=os.getenv("OPENAI_API_KEY"),
@@ -191,37 +364,83 @@ def load_config() -> AppConfig:
         enable_portfolio_preload=_env_flag("ENABLE_PORTFOLIO_PRELOAD", default_portfolio_preload),
         enable_website_preload=_env_flag("ENABLE_WEBSITE_PRELOAD", "true"),
         website_preload_mode=website_preload_mode,
+        website_refresh_interval_seconds=_env_int("WEBSITE_REFRESH_INTERVAL_SECONDS", 0),
         use_playwright=_env_flag("USE_PLAYWRIGHT", "false"),
         max_web_pages=_env_int("MAX_WEB_PAGES", 15),
+        crawl_concurrency=_env_int("CRAWL_CONCURRENCY", 8),
+        crawl_per_host_limit=_env_int("CRAWL_PER_HOST_LIMIT", 4),
+        crawl_deadline_seconds=_env_int("CRAWL_DEADLINE_SECONDS", 120),
+        crawl_use_sitemap=_env_flag("CRAWL_USE_SITEMAP", "true"),
+        crawl_respect_robots=_env_flag("CRAWL_RESPECT_ROBOTS", "true"),
+        html_extractor=html_extractor,
+        website_streaming_index=_env_flag("WEBSITE_STREAMING_INDEX", "true"),
+        website_index_batch_pages=_env_int("WEBSITE_INDEX_BATCH_PAGES", 4),
+        warmup_wait_seconds=_env_float("WARMUP_WAIT_SECONDS", 20.0),
         chunk_size=_env_int("CHUNK_SIZE", 900),
         chunk_overlap=_env_int("CHUNK_OVERLAP", 120),
         retriever_k=_env_int("RETRIEVER_K", 4),
+        retrieval_mode=retrieval_mode,
         max_history_messages=_env_int("MAX_HISTORY_MESSAGES", 6),
-        max_context_chars=_env_int("MAX_CONTEXT_CHARS", 12000),
+        max_context_chars=max_context_chars,
+        max_context_tokens=_env_int("MAX_CONTEXT_TOKENS", max_context_chars // CHARS_PER_TOKEN),
+        enable_context_compression=_env_flag("ENABLE_CONTEXT_COMPRESSION", "true"),
+        context_sentences_per_chunk=_env_int("CONTEXT_SENTENCES_PER_CHUNK", 4),
         max_output_tokens=_env_int("MAX_OUTPUT_TOKENS", 450),
         temperature=_env_float("OPENAI_TEMPERATURE", 0.2),
         request_timeout_seconds=_env_int("REQUEST_TIMEOUT_SECONDS", 60),
         openai_truncation=openai_truncation,
+        enable_fast_path=_env_flag("ENABLE_FAST_PATH", "true"),
+        embedding_model=os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002"),
+        index_mode=index_mode,
+        compact_dimensions=_env_int("COMPACT_DIMENSIONS", 256),
+        compact_dtype=compact_dtype,
+        compact_rerank_candidates=_env_int("COMPACT_RERANK_CANDIDATES", 40),
+        enable_index_cache=_env_flag("ENABLE_INDEX_CACHE", "true"),
+        index_cache_dir=index_cache_dir,
+        enable_crawl_snapshots=_env_flag("ENABLE_CRAWL_SNAPSHOTS", "true"),
+        crawl_snapshot_dir=_resolve_local_path("CRAWL_SNAPSHOT_DIR", os.path.join(index_cache_dir, "crawl")),
+        enable_embedding_cache=_env_flag("ENABLE_EMBEDDING_CACHE", "true"),
+        embedding_cache_path=_resolve_local_path(
+            "EMBEDDING_CACHE_PATH",
+            os.path.join(index_cache_dir, "embeddings.sqlite3"),
+        ),
+        embedding_batch_size=_env_int("EMBEDDING_BATCH_SIZE", 64),
+        embedding_concurrency=_env_int("EMBEDDING_CONCURRENCY", 4),
+        embedding_max_retries=_env_int("EMBEDDING_MAX_RETRIES", 5),
+        query_embedding_cache_size=_env_int("QUERY_EMBEDDING_CACHE_SIZE", 512),
+        query_embedding_cache_ttl_seconds=_env_int("QUERY_EMBEDDING_CACHE_TTL_SECONDS", 3600),
+        answer_cache_size=_env_int("ANSWER_CACHE_SIZE", 256),
+        answer_cache_ttl_seconds=_env_int("ANSWER_CACHE_TTL_SECONDS", 1800),
+        answer_cache_similarity=_env_float("ANSWER_CACHE_SIMILARITY", 0.95),
+        reload_poll_seconds=_env_int("RELOAD_POLL_SECONDS", 10),
+        enable_near_duplicate_filter=_env_flag("ENABLE_NEAR_DUPLICATE_FILTER", "true"),
+        near_duplicate_threshold=_env_float("NEAR_DUPLICATE_THRESHOLD", 0.8),
+        enable_request_coalescing=_env_flag("ENABLE_REQUEST_COALESCING", "true"),
+        max_concurrent_requests=_env_int("MAX_CONCURRENT_REQUESTS", 6),
+        max_queued_requests=_env_int("MAX_QUEUED_REQUESTS", 8),
+        queue_timeout_seconds=_env_float("QUEUE_TIMEOUT_SECONDS", 5.0),
+        session_rate_limit_per_minute=_env_int("SESSION_RATE_LIMIT_PER_MINUTE", 20),
+        session_rate_limit_burst=_env_int("SESSION_RATE_LIMIT_BURST", 5),
+        ip_rate_limit_per_minute=_env_int("IP_RATE_LIMIT_PER_MINUTE", 60),
+        ip_rate_limit_burst=_env_int("IP_RATE_LIMIT_BURST", 20),
+        rate_limit_max_keys=_env_int("RATE_LIMIT_MAX_KEYS", 10000),
+        trust_proxy_headers=_env_flag("TRUST_PROXY_HEADERS"),
+        trusted_proxy_hops=max(1, _env_int("TRUSTED_PROXY_HOPS", 1)),
+        enable_sessions=_env_flag("ENABLE_SESSIONS", "true"),
+        session_backend=session_backend,
+        session_db_path=_resolve_local_path(
+            "SESSION_DB_PATH",
+            os.path.join(index_cache_dir, "sessions.sqlite3"),
+        ),
+        session_max_entries=_env_int("SESSION_MAX_ENTRIES", 1000),
+        session_ttl_seconds=_env_int("SESSION_TTL_SECONDS", 86400),
+        session_history_tokens=_env_int("SESSION_HISTORY_TOKENS", 800),
+        session_summary_tokens=_env_int("SESSION_SUMMARY_TOKENS", 300),
+        prompt_layout=prompt_layout,
+        shared_context_max_tokens=_env_int("SHARED_CONTEXT_MAX_TOKENS", 4000),
     )
 
 
-def _node_to_text(node: ET.Element, depth: int = 0, lines: list[str] | None = None) -> str:
-    target = lines if lines is not None else []
-    label = node.tag.replace("_", " ").strip()
-    content = _compact_text(node.text or "")
-    indent = "  " * depth
-
-    if content:
-        target.append(f"{indent}{label}: {content}")
-    else:
-        target.append(f"{indent}{label}:")
-
-    for child in node:
-        _node_to_text(child, depth + 1, target)
-
-    return "\n".join(line for line in target if line).strip()
-
-
 class PortfolioAssistantService:
     def __init__(self, config: AppConfig) -> None:
         self.config = config
@@ -231,34 +450,191 @@ class PortfolioAssistantService:
             else None
         )
         self.embeddings = (
-            OpenAIEmbeddings()
+            OpenAIEmbeddings(model=config.embedding_model)
             if config.openai_api_key
             else None
         )
-        self.portfolio_vectorstore: FAISS | None = None
-        self.web_vectorstore: FAISS | None = None
-        self.system_instructions = DEFAULT_INSTRUCTIONS
+        # Request threads read self.snapshot once and keep that object for the
+        # whole request. Writers build everything first, then swap the reference.
+        self.snapshot = KnowledgeSnapshot()
+        self.snapshot_lock = threading.Lock()
+        self.snapshot_published = threading.Condition(self.snapshot_lock)
+        self.fast_path_answers = 0
+        self.website_pages: dict[str, WebsitePage] = {}
+        self.website_build_lock = threading.Lock()
+        self.portfolio_build_lock = threading.Lock()
+        self.shutdown_event = threading.Event()
+        self.watched_files: dict[str, tuple[int, int] | None] = {}
+        self.index_store = (
+            IndexArtifactStore(config.index_cache_dir)
+            if config.enable_index_cache
+            else None
+        )
+        self.crawl_snapshot_store = (
+            CrawlSnapshotStore(config.crawl_snapshot_dir)
+            if config.enable_crawl_snapshots
+            else None
+        )
+        self.embedding_cache = self._open_embedding_cache()
+        self.embedding_pipeline = EmbeddingPipeline(
+            batch_size=config.embedding_batch_size,
+            concurrency=config.embedding_concurrency,
+            max_retries=config.embedding_max_retries,
+        )
+        self.retriever = MultiSourceRetriever()
+        self.token_counter = TokenCounter(config.default_model)
+        self.context_packer = ContextPacker(
+            self.token_counter,
+            max_tokens=config.max_context_tokens,
+            sentences_per_chunk=config.context_sentences_per_chunk,
+            compress=config.enable_context_compression,
+        )
+        self.query_embedding_cache = TTLCache(
+            config.query_embedding_cache_size,
+            config.query_embedding_cache_ttl_seconds,
+        )
+        self.answer_cache = SemanticAnswerCache(
+            config.answer_cache_size,
+            config.answer_cache_ttl_seconds,
+            config.answer_cache_similarity,
+        )
+        self.session_store = self._open_session_store()
+        self.coalescer = (
+            SingleFlight(config.request_timeout_seconds) if config.enable_request_coalescing else None
+        )
+        self.warmup = SingleFlight()
+        self.warmup_status: dict[str, Any] = {
+            "running": False,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "runs": 0,
+            "waiting_requests": 0,
+        }
+        self.request_limiter = ConcurrencyLimiter(
+            config.max_concurrent_requests,
+            config.max_queued_requests,
+            config.queue_timeout_seconds,
+        )
+        self.session_rate_limiter = TokenBucketLimiter(
+            config.session_rate_limit_per_minute,
+            config.session_rate_limit_burst,
+            config.rate_limit_max_keys,
+        )
+        self.ip_rate_limiter = TokenBucketLimiter(
+            config.ip_rate_limit_per_minute,
+            config.ip_rate_limit_burst,
+            config.rate_limit_max_keys,
+        )
         self.state_lock = threading.Lock()
+        self.prompt_cache_stats = {
+            "requests": 0,
+            "requests_with_cache_hits": 0,
+            "input_tokens": 0,
+            "cached_tokens": 0,
+        }
         self.source_status: dict[str, SourceStatus] = {
             "portfolio": SourceStatus(enabled=config.enable_portfolio_preload),
             "website": SourceStatus(enabled=config.enable_website_preload),
         }
 
+    @property
+    def portfolio_vectorstore(self) -> FAISS | CompactVectorIndex | None:
+        return self.snapshot.portfolio_vectorstore
+
+    @property
+    def web_vectorstore(self) -> FAISS | CompactVectorIndex | None:
+        return self.snapshot.web_vectorstore
+
+    @property
+    def system_instructions(self) -> str:
+        return self.snapshot.system_instructions
+
+    @property
+    def portfolio_facts(self) -> PortfolioFactIndex | None:
+        return self.snapshot.portfolio_facts
+
+    def _publish_snapshot(self, **changes: Any) -> KnowledgeSnapshot:
+        with self.snapshot_lock:
+            current = self.snapshot
+            if "lexical_indexes" in changes:
+                changes["lexical_indexes"] = {**current.lexical_indexes, **changes["lexical_indexes"]}
+            self.snapshot = replace(
+                current,
+                version=current.version + 1,
+                published_at=time.time(),
+                **changes,
+            )
+            self.snapshot_published.notify_all()
+            return self.snapshot
+
+    def _open_embedding_cache(self) -> EmbeddingCache | None:
+        if not self.config.enable_embedding_cache:
+            return None
+        try:
+            return EmbeddingCache(self.config.embedding_cache_path)
+        except Exception as exc:
+            logger.warning(
+                "Embedding cache unavailable at %s, embedding without it: %s",
+                self.config.embedding_cache_path,
+                exc,
+            )
+            return None
+
+    def _open_session_store(self) -> SessionStore | None:
+        if not self.config.enable_sessions:
+            return None
+        backend: SessionBackend
+        if self.config.session_backend == "sqlite":
+            try:
+                backend = SqliteSessionBackend(
+                    self.config.session_db_path,
+                    self.config.session_max_entries,
+                    self.config.session_ttl_seconds,
+                )
+            except Exception as exc:
+                logger.warning(
+                    "Session database unavailable at %s, keeping sessions in memory: %s",
+                    self.config.session_db_path,
+                    exc,
+                )
+                backend = InMemorySessionBackend(self.config.session_max_entries, self.config.session_ttl_seconds)
+        else:
+            backend = InMemorySessionBackend(self.config.session_max_entries, self.config.session_ttl_seconds)
+        return SessionStore(
+            backend,
+            self.token_counter,
+            history_token_budget=self.config.session_history_tokens,
+            summary_token_budget=self.config.session_summary_tokens,
+            max_messages=self.config.max_history_messages,
+        )
+
+    def _session_enabled(self, session_id: str | None) -> bool:
+        return self.session_store is not None and SessionStore.valid_session_id(session_id)
+
+    def _remember_turn(self, chat_request: ChatRequestPayload, response_text: str) -> None:
+        if not response_text or not self._session_enabled(chat_request.session_id):
+            return
+        try:
+            self.session_store.append(chat_request.session_id, chat_request.prompt, response_text)
+        except Exception as exc:
+            logger.warning("Failed to store session turn for %s: %s", chat_request.session_id, exc)
+
     def load_system_instructions(self) -> None:
+        instructions = DEFAULT_INSTRUCTIONS
         try:
             if os.path.exists(self.config.instructions_path):
                 with open(self.config.instructions_path, "r", encoding="utf-8") as handle:
-                    self.system_instructions = handle.read().strip() or DEFAULT_INSTRUCTIONS
+                    instructions = handle.read().strip() or DEFAULT_INSTRUCTIONS
                 logger.info("Loaded instructions from %s", self.config.instructions_path)
             else:
                 logger.warning(
                     "Instructions file not found at %s. Using built-in defaults.",
                     self.config.instructions_path,
                 )
-                self.system_instructions = DEFAULT_INSTRUCTIONS
         except Exception as exc:
             logger.exception("Failed to load instructions: %s", exc)
-            self.system_instructions = DEFAULT_INSTRUCTIONS
+        self._publish_snapshot(system_instructions=instructions)
 
     def _set_source_status(self, source_name: str, **updates: Any) -> None:
         with self.state_lock:
@@ -273,56 +649,269 @@ class PortfolioAssistantService:
         if self.openai_client is None or self.embeddings is None:
             raise RuntimeError("OpenAI client is not initialized.")
 
+    def load_portfolio_facts(self) -> PortfolioFactIndex:
+        return PortfolioFactIndex.from_tree(ET.parse(self.config.portfolio_path).getroot())
+
     def load_portfolio_documents(self) -> list[Document]:
         xml_path = self.config.portfolio_path
         if not os.path.exists(xml_path):
             raise FileNotFoundError(f"Portfolio data file not found: {xml_path}")
 
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        documents: list[Document] = []
-
-        for child in root:
-            section_name = child.tag.replace("_", " ").strip()
-            section_text = _node_to_text(child)
-            if not section_text:
-                continue
-
-            documents.append(
-                Document(
-                    page_content=section_text,
-                    metadata={
-                        "source_type": "portfolio_xml",
-                        "source_id": f"portfolio:{child.tag}",
-                        "title": f"Portfolio XML - {section_name.title()}",
-                        "url": None,
-                    },
-                )
-            )
-
+        documents = PortfolioXmlChunker(max_chars=self.config.chunk_size).chunk(xml_path)
         if not documents:
             raise RuntimeError("Portfolio XML was parsed but no usable text was found.")
 
         return documents
 
-    def build_vector_store(self, documents: list[Document]) -> tuple[FAISS, int]:
-        self._require_openai_setup()
+    def _index_artifact_key(self, documents: list[Document]) -> str:
+        return artifact_key(
+            content_hash=fingerprint_documents(documents),
+            chunk_size=self.config.chunk_size,
+            chunk_overlap=self.config.chunk_overlap,
+            embedding_model=self.config.embedding_model,
+            index_options=self._index_options(),
+        )
+
+    def _index_options(self) -> dict[str, Any]:
+        if self.config.index_mode != "compact":
+            return {"index_mode": "flat"}
+        return {
+            "index_mode": "compact",
+            "dimensions": self.config.compact_dimensions,
+            "dtype": self.config.compact_dtype,
+            "rerank_candidates": self.config.compact_rerank_candidates,
+        }
+
+    def embed_chunks(
+        self,
+        texts: list[str],
+        source_name: str,
+        embedding_memo: dict[str, list[float]] | None = None,
+    ) -> list[list[float]]:
+        model = self.config.embedding_model
+        keys = [chunk_cache_key(text, model) for text in texts]
+        cached = self.embedding_cache.get_many(keys) if self.embedding_cache is not None else {}
+        if embedding_memo:
+            cached.update({key: embedding_memo[key] for key in keys if key in embedding_memo})
+
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        hits = len(texts) - len(missing)
+        progress = {"embedded": hits}
+        self._set_source_status(
+            source_name,
+            embedded_chunks=hits,
+            total_chunks=len(texts),
+            embedding_cache_hits=hits,
+            embedding_cache_misses=len(missing),
+        )
+
+        missing_keys = list(missing.keys())
+
+        def record_batch(indices: list[int], vectors: list[list[float]]) -> None:
+            fresh = {missing_keys[index]: vector for index, vector in zip(indices, vectors)}
+            if self.embedding_cache is not None:
+                try:
+                    self.embedding_cache.put_many(fresh, model)
+                except Exception as exc:
+                    logger.warning("Failed to write %s chunk embeddings to cache: %s", source_name, exc)
+            progress["embedded"] += len(indices)
+            self._set_source_status(source_name, embedded_chunks=progress["embedded"])
+
+        if missing:
+            fresh_vectors = self.embedding_pipeline.embed(
+                self.embeddings,
+                list(missing.values()),
+                on_batch=record_batch,
+            )
+            cached.update(zip(missing_keys, fresh_vectors))
+
+        if embedding_memo is not None:
+            embedding_memo.update((key, cached[key]) for key in keys)
+        logger.info("Embedded %s chunks: %s cache hits, %s misses", source_name, hits, len(missing))
+        return [cached[key] for key in keys]
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.config.chunk_size,
             chunk_overlap=self.config.chunk_overlap,
         )
-        chunks = splitter.split_documents(documents)
+        # Portfolio XML already arrives as one chunk per record from the XML
+        # chunker; only free-form page text goes through the generic splitter.
+        chunks: list[Document] = []
+        for document in documents:
+            if document.metadata.get("source_type") == "portfolio_xml":
+                chunks.append(document)
+            else:
+                chunks.extend(splitter.split_documents([document]))
         if not chunks:
             raise RuntimeError("No text chunks were produced for indexing.")
-        vectorstore = FAISS.from_documents(chunks, embedding=self.embeddings)
-        return vectorstore, len(chunks)
+        return chunks
+
+    def build_vector_store(
+        self,
+        documents: list[Document],
+        chunks: list[Document],
+        source_name: str,
+        embedding_memo: dict[str, list[float]] | None = None,
+    ) -> FAISS | CompactVectorIndex:
+        self._require_openai_setup()
+        key = self._index_artifact_key(documents) if self.index_store is not None else None
+
+        if key is not None:
+            cached = self.index_store.load(source_name, key, self.embeddings)
+            if cached is not None:
+                vectorstore, _ = cached
+                self._set_source_status(
+                    source_name,
+                    index_artifact=f"loaded:{key}",
+                    embedding_cache_hits=0,
+                    embedding_cache_misses=0,
+                )
+                return vectorstore
+
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = self.embed_chunks(texts, source_name, embedding_memo)
+        metadatas = [chunk.metadata for chunk in chunks]
+        if self.config.index_mode == "compact":
+            vectorstore = CompactVectorIndex.from_embeddings(
+                texts,
+                vectors,
+                metadatas,
+                dimensions=self.config.compact_dimensions,
+                dtype=self.config.compact_dtype,
+                rerank_candidates=self.config.compact_rerank_candidates,
+            )
+        else:
+            vectorstore = FAISS.from_embeddings(
+                list(zip(texts, vectors)),
+                embedding=self.embeddings,
+                metadatas=metadatas,
+            )
+
+        if key is not None:
+            try:
+                artifact_path = self.index_store.save(
+                    source_name,
+                    key,
+                    vectorstore,
+                    {
+                        "source": source_name,
+                        "documents": len(documents),
+                        "chunks": len(chunks),
+                        "embedding_model": self.config.embedding_model,
+                        **self._index_options(),
+                    },
+                )
+                self._set_source_status(source_name, index_artifact=f"built:{key}")
+                if isinstance(vectorstore, CompactVectorIndex):
+                    # Serve from the memory-mapped files so workers share one copy.
+                    vectorstore = CompactVectorIndex.load_local(artifact_path)
+            except Exception as exc:
+                logger.warning("Failed to persist %s index artifact: %s", source_name, exc)
+
+        return vectorstore
+
+    def _source_vectorstore(self, source_name: str) -> FAISS | CompactVectorIndex | None:
+        return self.snapshot.vectorstore(source_name)
+
+    def _publish_source_index(
+        self,
+        source_name: str,
+        vectorstore: FAISS | CompactVectorIndex | None,
+        lexical_index: BM25Index,
+        **snapshot_changes: Any,
+    ) -> None:
+        vectorstore_field = "portfolio_vectorstore" if source_name == "portfolio" else "web_vectorstore"
+        self._publish_snapshot(
+            lexical_indexes={source_name: lexical_index},
+            **{vectorstore_field: vectorstore},
+            **snapshot_changes,
+        )
+        self.query_embedding_cache.clear()
+
+    def index_documents(
+        self,
+        source_name: str,
+        documents: list[Document],
+        embedding_memo: dict[str, list[float]] | None = None,
+        **snapshot_changes: Any,
+    ) -> int:
+        chunks = self.split_documents(documents)
+        lexical_index = BM25Index(chunks)
+        vectorstore = None
+
+        if self.config.retrieval_mode != "lexical":
+            try:
+                vectorstore = self.build_vector_store(documents, chunks, source_name, embedding_memo)
+            except Exception as exc:
+                # A lexical-only source is still useful, but never replace a
+                # working vector index with one that cannot do semantic search.
+                if self.config.retrieval_mode == "vector" or self._source_vectorstore(source_name) is not None:
+                    raise
+                logger.warning(
+                    "Vector index for %s unavailable. Serving lexical retrieval only: %s",
+                    source_name,
+                    exc,
+                )
+
+        self._publish_source_index(source_name, vectorstore, lexical_index, **snapshot_changes)
+        self._set_source_status(
+            source_name,
+            lexical_only=vectorstore is None,
+            documents=len(documents),
+            chunks=len(chunks),
+        )
+        return len(chunks)
+
+    def _mark_source_failed(self, source_name: str, exc: Exception) -> None:
+        if self._source_ready(source_name):
+            # A reload failed but the previous snapshot is still serving.
+            self._set_source_status(source_name, loading=False, error=str(exc))
+            return
+        self._set_source_status(
+            source_name,
+            loading=False,
+            loaded=False,
+            documents=0,
+            chunks=0,
+            error=str(exc),
+        )
 
     def preload_portfolio_data(self) -> None:
+        with self.portfolio_build_lock:
+            self._preload_portfolio_data()
+
+    def _shared_portfolio_context(self, documents: list[Document]) -> str:
+        # The whole portfolio in file order, identical for every request, so it
+        # can sit in the cached prompt prefix instead of being retrieved.
+        if self.config.prompt_layout != "stable":
+            return ""
+        blocks = [
+            f"[{document.metadata.get('title') or document.metadata.get('source_id')}]\n{document.page_content.strip()}"
+            for document in documents
+        ]
+        shared_context = "\n\n".join(blocks)
+        if self.token_counter.count(shared_context) > self.config.shared_context_max_tokens:
+            logger.info(
+                "Portfolio context is over SHARED_CONTEXT_MAX_TOKENS. Using retrieved chunks in source order instead."
+            )
+            return ""
+        return shared_context
+
+    def _preload_portfolio_data(self) -> None:
         self._set_source_status("portfolio", loading=True, error=None)
         try:
             documents = self.load_portfolio_documents()
-            vectorstore, chunk_count = self.build_vector_store(documents)
-            self.portfolio_vectorstore = vectorstore
+            chunk_count = self.index_documents(
+                "portfolio",
+                documents,
+                portfolio_facts=self.load_portfolio_facts(),
+                shared_context=self._shared_portfolio_context(documents),
+            )
             self._set_source_status(
                 "portfolio",
                 loading=False,
@@ -334,14 +923,7 @@ class PortfolioAssistantService:
             logger.info("Portfolio data indexed: %s documents, %s chunks", len(documents), chunk_count)
         except Exception as exc:
             logger.exception("Failed to preload portfolio data: %s", exc)
-            self._set_source_status(
-                "portfolio",
-                loading=False,
-                loaded=False,
-                documents=0,
-                chunks=0,
-                error=str(exc),
-            )
+            self._mark_source_failed("portfolio", exc)
 
     def preload_website_data(self) -> None:
         if not self.config.source_url:
@@ -353,94 +935,467 @@ class PortfolioAssistantService:
             )
             return
 
+        with self.website_build_lock:
+            restored = self._restore_website_snapshot()
+            if not restored:
+                self._preload_website_data()
+
+        if restored:
+            # The snapshot is already serving; the crawl only has to confirm it.
+            # Pages come back as conditional requests against the stored ETags.
+            thread = threading.Thread(
+                target=self.refresh_website_data,
+                name="website-revalidate",
+                daemon=True,
+            )
+            thread.start()
+
+    def _restore_website_snapshot(self) -> bool:
+        if self.crawl_snapshot_store is None or self.website_pages:
+            return False
+        snapshot = self.crawl_snapshot_store.load(self.config.source_url)
+        if snapshot is None or not snapshot.pages:
+            return False
+
         self._set_source_status("website", loading=True, error=None)
         try:
-            pages = crawl_website_pages(
-                self.config.source_url,
-                max_pages=self.config.max_web_pages,
-                use_playwright=self.config.use_playwright,
+            documents = self._website_documents(snapshot.pages)
+            if not documents:
+                return False
+            chunk_count = self.index_documents("website", documents)
+        except Exception as exc:
+            logger.warning("Could not index the crawl snapshot. Crawling instead: %s", exc)
+            return False
+
+        self.website_pages = {page.url: page for page in snapshot.pages}
+        self._set_source_status(
+            "website",
+            loading=False,
+            loaded=True,
+            documents=len(documents),
+            chunks=chunk_count,
+            pages_crawled=len(snapshot.pages),
+            pages_indexed=len(documents),
+            restored_from_snapshot=True,
+            snapshot_saved_at=snapshot.saved_at,
+            error=None,
+        )
+        logger.info(
+            "Website data restored from crawl snapshot: %s pages, %s chunks. Revalidating in the background.",
+            len(documents),
+            chunk_count,
+        )
+        return True
+
+    def _save_website_snapshot(self, pages: list[WebsitePage]) -> None:
+        if self.crawl_snapshot_store is None:
+            return
+        try:
+            self.crawl_snapshot_store.save(self.config.source_url, pages)
+            self._set_source_status("website", snapshot_saved_at=time.time())
+        except Exception as exc:
+            logger.warning("Could not save crawl snapshot: %s", exc)
+
+    def _crawl_options(self, previous_pages: dict[str, WebsitePage] | None = None) -> dict[str, Any]:
+        return {
+            "max_pages": self.config.max_web_pages,
+            "use_playwright": self.config.use_playwright,
+            "previous_pages": previous_pages,
+            "concurrency": self.config.crawl_concurrency,
+            "per_host_limit": self.config.crawl_per_host_limit,
+            "deadline_seconds": self.config.crawl_deadline_seconds or None,
+            "use_sitemap": self.config.crawl_use_sitemap,
+            "respect_robots": self.config.crawl_respect_robots,
+            "html_extractor": self.config.html_extractor,
+        }
+
+    def crawl_website(self, previous_pages: dict[str, WebsitePage] | None = None) -> list[WebsitePage]:
+        return crawl_website_pages(self.config.source_url, **self._crawl_options(previous_pages))
+
+    def _publish_partial_website_index(
+        self,
+        pages: list[WebsitePage],
+        embedding_memo: dict[str, list[float]],
+    ) -> None:
+        documents = self._website_documents(pages)
+        if not documents:
+            return
+        chunks = self.split_documents(documents)
+        vectorstore = None
+        if self.config.retrieval_mode != "lexical" and self.embeddings is not None:
+            texts = [chunk.page_content for chunk in chunks]
+            vectors = self.embed_chunks(texts, "website", embedding_memo)
+            # Partial indexes are always exact flat indexes and never written to
+            # the artifact store; the finished crawl builds the configured one.
+            vectorstore = FAISS.from_embeddings(
+                list(zip(texts, vectors)),
+                embedding=self.embeddings,
+                metadatas=[chunk.metadata for chunk in chunks],
             )
-            documents = [
-                Document(
-                    page_content=page.text,
-                    metadata={
-                        "source_type": "website",
-                        "source_id": page.url,
-                        "title": page.title or page.url,
-                        "url": page.url,
-                    },
+
+        self._publish_source_index("website", vectorstore, BM25Index(chunks))
+        self._set_source_status(
+            "website",
+            loaded=True,
+            partial=True,
+            lexical_only=vectorstore is None,
+            documents=len(documents),
+            chunks=len(chunks),
+            pages_indexed=len(documents),
+        )
+        logger.info("Website partially indexed: %s pages, %s chunks", len(documents), len(chunks))
+
+    def _stream_website_pages(self, embedding_memo: dict[str, list[float]]) -> list[WebsitePage]:
+        # Pages are indexed in micro-batches while the crawl is still running,
+        # so the website source starts answering after its first page. Only a
+        # source with nothing serving yet gets partial indexes.
+        stream_partials = not self._source_ready("website")
+        batch_pages = max(1, self.config.website_index_batch_pages)
+        arrived: dict[int, WebsitePage] = {}
+        pending = 0
+
+        for position, page in iter_website_pages(self.config.source_url, **self._crawl_options()):
+            arrived[position] = page
+            pending += 1
+            self._set_source_status("website", pages_crawled=len(arrived))
+            if not stream_partials or (pending < batch_pages and self._source_ready("website")):
+                continue
+            pending = 0
+            try:
+                self._publish_partial_website_index(
+                    [arrived[key] for key in sorted(arrived)],
+                    embedding_memo,
                 )
-                for page in pages
-                if page.text
-            ]
+            except Exception as exc:
+                logger.warning("Partial website index failed. Continuing the crawl: %s", exc)
+
+        return [arrived[key] for key in sorted(arrived)]
+
+    def _website_documents(self, pages: list[WebsitePage]) -> list[Document]:
+        texts = [page.text for page in pages]
+        if self.config.enable_near_duplicate_filter:
+            texts, removed = remove_repeated_blocks(texts, self.config.near_duplicate_threshold)
+            self._set_source_status("website", duplicate_blocks_removed=removed)
+        return [
+            Document(
+                page_content=text,
+                metadata={
+                    "source_type": "website",
+                    "source_id": page.url,
+                    "title": page.title or page.url,
+                    "url": page.url,
+                },
+            )
+            for page, text in zip(pages, texts)
+            if text
+        ]
+
+    def _preload_website_data(self) -> None:
+        self._set_source_status("website", loading=True, error=None)
+        try:
+            embedding_memo: dict[str, list[float]] = {}
+            if self.config.website_streaming_index:
+                pages = self._stream_website_pages(embedding_memo)
+            else:
+                pages = self.crawl_website()
+            documents = self._website_documents(pages)
 
             if not documents:
                 raise RuntimeError("Website crawl completed but no usable HTML text was collected.")
 
-            vectorstore, chunk_count = self.build_vector_store(documents)
-            self.web_vectorstore = vectorstore
+            chunk_count = self.index_documents("website", documents, embedding_memo)
+            self.website_pages = {page.url: page for page in pages}
+            self._save_website_snapshot(pages)
             self._set_source_status(
                 "website",
                 loading=False,
                 loaded=True,
+                partial=False,
                 documents=len(documents),
                 chunks=chunk_count,
+                pages_crawled=len(pages),
+                pages_indexed=len(documents),
                 error=None,
             )
             logger.info("Website data indexed: %s pages, %s chunks", len(documents), chunk_count)
         except Exception as exc:
             logger.exception("Failed to preload website data: %s", exc)
+            self._mark_source_failed("website", exc)
+
+    def refresh_website_data(self) -> None:
+        if not self.config.source_url:
+            return
+        if not self.website_build_lock.acquire(blocking=False):
+            logger.info("Website index build already in progress. Skipping scheduled refresh.")
+            return
+
+        try:
+            if not self.website_pages:
+                self._preload_website_data()
+                return
+
+            previous_pages = self.website_pages
+            pages = self.crawl_website(previous_pages)
+            current_pages = {page.url: page for page in pages}
+            if not current_pages:
+                raise RuntimeError("Website refresh collected no pages. Keeping the current index.")
+
+            changed_urls = [
+                url
+                for url, page in current_pages.items()
+                if url not in previous_pages or previous_pages[url].text != page.text
+            ]
+            removed_urls = [url for url in previous_pages if url not in current_pages]
+
+            if changed_urls or removed_urls:
+                documents = self._website_documents(pages)
+                self.index_documents("website", documents)
+                self._set_source_status("website", pages_indexed=len(documents))
+
+            self.website_pages = current_pages
+            self._save_website_snapshot(pages)
             self._set_source_status(
                 "website",
-                loading=False,
-                loaded=False,
-                documents=0,
-                chunks=0,
-                error=str(exc),
+                last_refreshed=time.time(),
+                pages_crawled=len(current_pages),
+                changed_documents=len(changed_urls) + len(removed_urls),
+                error=None,
             )
+            logger.info(
+                "Website refresh finished: %s changed, %s removed, %s unchanged",
+                len(changed_urls),
+                len(removed_urls),
+                len(current_pages) - len(changed_urls),
+            )
+        except Exception as exc:
+            logger.exception("Website refresh failed: %s", exc)
+            self._set_source_status("website", error=str(exc))
+        finally:
+            self.website_build_lock.release()
+
+    def _run_website_refresh_scheduler(self) -> None:
+        interval = self.config.website_refresh_interval_seconds
+        while not self.shutdown_event.wait(interval):
+            self.refresh_website_data()
+
+    def start_website_refresh_scheduler(self) -> None:
+        interval = self.config.website_refresh_interval_seconds
+        if interval <= 0 or not self.config.source_url:
+            return
+        logger.info("Website refresh scheduled every %s seconds.", interval)
+        thread = threading.Thread(
+            target=self._run_website_refresh_scheduler,
+            name="website-refresh",
+            daemon=True,
+        )
+        thread.start()
+
+    def _file_signature(self, path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watched_reloaders(self) -> dict[str, Callable[[], None]]:
+        reloaders = {self.config.instructions_path: self.load_system_instructions}
+        if self.config.enable_portfolio_preload:
+            reloaders[self.config.portfolio_path] = self.preload_portfolio_data
+        return reloaders
+
+    def check_knowledge_files(self) -> list[str]:
+        reloaded: list[str] = []
+        for path, reload in self._watched_reloaders().items():
+            signature = self._file_signature(path)
+            if self.watched_files.get(path) == signature:
+                continue
+            self.watched_files[path] = signature
+            logger.info("Detected change in %s. Rebuilding knowledge snapshot.", path)
+            reload()
+            reloaded.append(path)
+        return reloaded
+
+    def _run_knowledge_watcher(self) -> None:
+        interval = self.config.reload_poll_seconds
+        while not self.shutdown_event.wait(interval):
+            try:
+                self.check_knowledge_files()
+            except Exception as exc:
+                logger.exception("Knowledge file reload failed: %s", exc)
+
+    def start_knowledge_watcher(self) -> None:
+        if self.config.reload_poll_seconds <= 0:
+            return
+        for path in self._watched_reloaders():
+            self.watched_files[path] = self._file_signature(path)
+        logger.info("Watching knowledge files every %s seconds.", self.config.reload_poll_seconds)
+        thread = threading.Thread(
+            target=self._run_knowledge_watcher,
+            name="knowledge-watcher",
+            daemon=True,
+        )
+        thread.start()
 
     def load_startup_sources(self) -> None:
         logger.info("Starting Portfolio Assistant API version %s", APP_VERSION)
+        self.start_knowledge_watcher()
         self.load_system_instructions()
 
+        # Startup builds go through the same single-flight keys as request
+        # warm-ups, so an early request joins them instead of starting its own.
         if self.config.enable_portfolio_preload:
-            self.preload_portfolio_data()
+            self.warmup.do(("source", "portfolio"), self.preload_portfolio_data)
         else:
             logger.info("Portfolio preload disabled.")
 
         if self.config.enable_website_preload:
             if self.config.website_preload_mode == "background":
                 logger.info("Website preload running in the background.")
-                thread = threading.Thread(
-                    target=self.preload_website_data,
-                    name="website-preload",
-                    daemon=True,
-                )
-                thread.start()
+                self.warmup.start(("source", "website"), self.preload_website_data, "website-preload")
             else:
-                self.preload_website_data()
+                self.warmup.do(("source", "website"), self.preload_website_data)
+            self.start_website_refresh_scheduler()
         else:
             logger.info("Website preload disabled.")
 
+    def build_index_artifacts(self, source: str = "all") -> int:
+        if self.index_store is None:
+            logger.error("ENABLE_INDEX_CACHE is off, so there is nowhere to write index artifacts.")
+            return 1
+        if self.config.retrieval_mode == "lexical":
+            logger.error("RETRIEVAL_MODE is lexical, so there is no vector index to build.")
+            return 1
+
+        targets = ["portfolio", "website"] if source == "all" else [source]
+        if "portfolio" in targets:
+            self.preload_portfolio_data()
+        if "website" in targets:
+            self.preload_website_data()
+
+        failed = False
+        for name in targets:
+            status = self.source_status[name]
+            if not status.loaded:
+                logger.error("Index build for %s failed: %s", name, status.error)
+                failed = True
+            elif status.lexical_only or status.index_artifact is None:
+                # Serving falls back to BM25 when embedding fails, but a build
+                # that wrote no vector artifact must not pass as a success.
+                logger.error("Index build for %s failed: no vector index artifact was written.", name)
+                failed = True
+        return 1 if failed else 0
+
+    def _source_ready(self, source_name: str) -> bool:
+        if self._source_vectorstore(source_name) is not None:
+            return True
+        return self.config.retrieval_mode != "vector" and source_name in self.snapshot.lexical_indexes
+
+    def benchmark_compact_index(self, source: str, queries: int, questions_path: str | None = None) -> int:
+        self._require_openai_setup()
+        if source == "portfolio":
+            documents = self.load_portfolio_documents()
+        else:
+            if not self.config.source_url:
+                logger.error("SOURCE_URL is not configured.")
+                return 1
+            pages = self.crawl_website()
+            documents = self._website_documents(pages)
+
+        chunks = self.split_documents(documents)
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = self.embed_chunks(texts, source)
+        compact_index = CompactVectorIndex.from_embeddings(
+            texts,
+            vectors,
+            [chunk.metadata for chunk in chunks],
+            dimensions=self.config.compact_dimensions,
+            dtype=self.config.compact_dtype,
+            rerank_candidates=self.config.compact_rerank_candidates,
+        )
+        question_vectors: list[list[float]] | None = None
+        if questions_path:
+            with open(questions_path, "r", encoding="utf-8") as handle:
+                questions = [line.strip() for line in handle if line.strip()]
+            question_vectors = self.embeddings.embed_documents(questions)
+        report = compare_with_flat(
+            compact_index.vectors,
+            compact_index,
+            k=self.config.retriever_k,
+            query_count=queries,
+            queries=question_vectors,
+        )
+        print(json.dumps({"source": source, **report}, indent=2))
+        return 0
+
+    def benchmark_html_extractors(self, fixtures_dir: str, repeat: int) -> int:
+        try:
+            report = benchmark_extractors(fixtures_dir, repeat=repeat)
+        except FileNotFoundError as exc:
+            logger.error("%s", exc)
+            return 1
+        print(json.dumps(report, indent=2))
+        mismatched = any(result["parity_mismatches"] for result in report["extractors"].values())
+        return 1 if mismatched else 0
+
     def has_ready_source(self) -> bool:
-        return self.portfolio_vectorstore is not None or self.web_vectorstore is not None
+        return self._source_ready("portfolio") or self._source_ready("website")
 
     def is_ready(self) -> bool:
         return bool(self.config.openai_api_key) and self.has_ready_source()
 
+    def _warm_up_sources(self) -> None:
+        logger.info("No ready knowledge source found. Warming up.")
+        with self.state_lock:
+            self.warmup_status.update(running=True, started_at=time.time(), finished_at=None, error=None)
+            self.warmup_status["runs"] += 1
+        try:
+            if self.config.enable_portfolio_preload and not self._source_ready("portfolio"):
+                self.warmup.do(("source", "portfolio"), self.preload_portfolio_data)
+
+            if not self.has_ready_source() and self.config.enable_website_preload and not self._source_ready("website"):
+                self.warmup.do(("source", "website"), self.preload_website_data)
+        except Exception as exc:
+            logger.exception("Warm-up failed: %s", exc)
+            with self.state_lock:
+                self.warmup_status["error"] = str(exc)
+            raise
+        finally:
+            with self.state_lock:
+                self.warmup_status.update(running=False, finished_at=time.time())
+            # Wakes requests that are waiting for a source even when nothing
+            # new was published.
+            with self.snapshot_published:
+                self.snapshot_published.notify_all()
+
     def ensure_sources_ready(self) -> None:
         if self.has_ready_source():
             return
 
-        logger.info("No ready knowledge source found. Attempting synchronous warm-up.")
-        if self.config.enable_portfolio_preload and self.portfolio_vectorstore is None:
-            self.preload_portfolio_data()
+        # One warm-up runs at a time however many requests arrive. Each request
+        # waits for a ready source up to WARMUP_WAIT_SECONDS; a streamed website
+        # build can be ready well before the warm-up as a whole finishes.
+        call, _ = self.warmup.start("warmup", self._warm_up_sources, "source-warmup")
+        with self.state_lock:
+            self.warmup_status["waiting_requests"] += 1
+        try:
+            with self.snapshot_published:
+                self.snapshot_published.wait_for(
+                    lambda: self.has_ready_source() or call.done.is_set(),
+                    timeout=self.config.warmup_wait_seconds,
+                )
+        finally:
+            with self.state_lock:
+                self.warmup_status["waiting_requests"] -= 1
 
-        if not self.has_ready_source() and self.config.enable_website_preload and self.web_vectorstore is None:
-            self.preload_website_data()
+        if self.has_ready_source():
+            return
+        if not call.done.is_set():
+            raise RuntimeError("Knowledge sources are still warming up. Please retry shortly.")
+        raise RuntimeError("Knowledge sources are still warming up or failed to load.")
 
-        if not self.has_ready_source():
-            raise RuntimeError("Knowledge sources are still warming up or failed to load.")
+    def warmup_snapshot(self) -> dict[str, Any]:
+        with self.state_lock:
+            return {**self.warmup_status, "wait_seconds": self.config.warmup_wait_seconds}
 
     def health_snapshot(self) -> dict[str, Any]:
         return {
@@ -451,12 +1406,51 @@ class PortfolioAssistantService:
             "default_model": self.config.default_model,
             "allowed_models": self.config.allowed_models,
             "source_url": self.config.source_url,
+            "query_embedding_cache": self.query_embedding_cache.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "prompt_cache": self.prompt_cache_snapshot(),
+            "sessions": self.session_store.stats() if self.session_store is not None else {"enabled": False},
+            "request_coalescing": self.coalescer.stats() if self.coalescer is not None else {"enabled": False},
+            "admission": {
+                "concurrency": self.request_limiter.stats(),
+                "ip_rate_limit": self.ip_rate_limiter.stats(),
+                "session_rate_limit": self.session_rate_limiter.stats(),
+            },
+            "warmup": self.warmup_snapshot(),
+            "knowledge_snapshot": {
+                "version": self.snapshot.version,
+                "published_at": self.snapshot.published_at,
+            },
+            "fast_path": {
+                "enabled": self.config.enable_fast_path,
+                "available": self.portfolio_facts is not None,
+                "answers": self.fast_path_answers,
+            },
             "sources": {
                 source_name: status.as_dict()
                 for source_name, status in self.source_status.items()
             },
         }
 
+    def client_address(self, remote_addr: str | None, forwarded_for: str | None) -> str | None:
+        if self.config.trust_proxy_headers and forwarded_for:
+            # Each trusted proxy appends the address it saw, so only entries
+            # counted from the right can be trusted; anything further left
+            # came from the client and can be forged.
+            entries = [entry.strip() for entry in forwarded_for.split(",") if entry.strip()]
+            if entries:
+                return entries[-min(self.config.trusted_proxy_hops, len(entries))]
+        return remote_addr
+
+    def check_rate_limits(self, chat_request: ChatRequestPayload, client_address: str | None) -> None:
+        for reason, limiter, key in (
+            ("ip_rate_limited", self.ip_rate_limiter, client_address),
+            ("session_rate_limited", self.session_rate_limiter, chat_request.session_id),
+        ):
+            wait_seconds = limiter.acquire(key)
+            if wait_seconds:
+                raise AdmissionRejected(reason, RATE_LIMITED_MESSAGE, 429, wait_seconds)
+
     def _validate_model(self, model_name: str) -> str:
         requested_model = model_name.strip() if model_name else self.config.default_model
         if requested_model not in self.config.allowed_models:
@@ -519,66 +1513,103 @@ class PortfolioAssistantService:
 
         model = self._validate_model(str(body.get("model", self.config.default_model) or self.config.default_model))
         session_id = str(body.get("session_id", "") or "").strip() or None
-        return ChatRequestPayload(prompt=prompt, messages=history, model=model, session_id=session_id)
-
-    def _get_retriever(self):
-        retrievers = []
-        if self.portfolio_vectorstore is not None:
-            retrievers.append(
-                self.portfolio_vectorstore.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": self.config.retriever_k},
-                )
-            )
-        if self.web_vectorstore is not None:
-            retrievers.append(
-                self.web_vectorstore.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": self.config.retriever_k},
-                )
-            )
 
-        if not retrievers:
-            raise RuntimeError("No knowledge sources are available yet.")
-        if len(retrievers) == 1:
-            return retrievers[0]
-        return EnsembleRetriever(retrievers=retrievers, weights=[1.0] * len(retrievers))
+        # Clients that send their own history keep full control of it; otherwise
+        # a known session_id brings back the stored turns and running summary.
+        summary = ""
+        if not history and self._session_enabled(session_id):
+            state = self.session_store.load(session_id)
+            history = list(state.turns)
+            summary = state.summary_text
+
+        return ChatRequestPayload(
+            prompt=prompt,
+            messages=history,
+            model=model,
+            session_id=session_id,
+            history_summary=summary,
+        )
+
+    def _ready_vectorstores(self, snapshot: KnowledgeSnapshot) -> list[FAISS | CompactVectorIndex]:
+        return [
+            vectorstore
+            for vectorstore in (snapshot.portfolio_vectorstore, snapshot.web_vectorstore)
+            if vectorstore is not None
+        ]
+
+    def _query_embedding_key(self, prompt: str) -> tuple[str, str]:
+        return self.config.embedding_model, normalize_prompt(prompt)
+
+    def embed_query(self, prompt: str) -> list[float]:
+        cache_key = self._query_embedding_key(prompt)
+        cached = self.query_embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        embedding = self.embeddings.embed_query(prompt)
+        self.query_embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    def _needs_query_embedding(self, snapshot: KnowledgeSnapshot) -> bool:
+        return self.config.retrieval_mode != "lexical" and bool(self._ready_vectorstores(snapshot))
+
+    def _query_embedding_failed(self, exc: Exception) -> None:
+        if self.config.retrieval_mode == "vector":
+            raise RuntimeError(f"Query embedding failed: {exc}") from exc
+        logger.warning("Query embedding failed. Falling back to lexical retrieval: %s", exc)
+
+    def _try_embed_query(self, prompt: str, snapshot: KnowledgeSnapshot) -> list[float] | None:
+        if not self._needs_query_embedding(snapshot):
+            return None
+        try:
+            return self.embed_query(prompt)
+        except Exception as exc:
+            self._query_embedding_failed(exc)
+            return None
 
     def retrieve_documents(self, prompt: str) -> list[Document]:
         self.ensure_sources_ready()
-        retriever = self._get_retriever()
-        if hasattr(retriever, "invoke"):
-            documents = retriever.invoke(prompt)
-        else:
-            documents = retriever.get_relevant_documents(prompt)
+        snapshot = self.snapshot
+        return self._search_sources(prompt, self._try_embed_query(prompt, snapshot), snapshot)
+
+    def _search_sources(
+        self,
+        prompt: str,
+        query_embedding: list[float] | None,
+        snapshot: KnowledgeSnapshot,
+    ) -> list[Document]:
+        vectorstores = self._ready_vectorstores(snapshot)
+        lexical_indexes = (
+            list(snapshot.lexical_indexes.values())
+            if self.config.retrieval_mode != "vector"
+            else []
+        )
+        if not vectorstores and not lexical_indexes:
+            raise RuntimeError("No knowledge sources are available yet.")
+
+        documents = self.retriever.search(
+            prompt,
+            query_embedding,
+            vectorstores,
+            lexical_indexes,
+            k=self.config.retriever_k,
+        )
 
         unique_documents: list[Document] = []
         seen: set[tuple[str, str]] = set()
         for document in documents:
-            source_id = str(document.metadata.get("source_id", "unknown"))
-            fingerprint = (source_id, document.page_content)
+            fingerprint = document_fingerprint(document)
             if fingerprint in seen:
                 continue
             seen.add(fingerprint)
             unique_documents.append(document)
-        return unique_documents
 
-    def format_context(self, documents: list[Document]) -> str:
-        blocks: list[str] = []
-        current_size = 0
-
-        for index, document in enumerate(documents, start=1):
-            title = document.metadata.get("title") or document.metadata.get("source_id") or f"Source {index}"
-            location = document.metadata.get("url") or document.metadata.get("source_id") or "unknown"
-            block = f"[Source {index}] {title}\nLocation: {location}\n{document.page_content.strip()}".strip()
-
-            if blocks and current_size + len(block) > self.config.max_context_chars:
-                break
-
-            blocks.append(block)
-            current_size += len(block)
+        if self.config.enable_near_duplicate_filter:
+            unique_documents = collapse_near_duplicates(unique_documents, self.config.near_duplicate_threshold)
+        return unique_documents
 
-        return "\n\n".join(blocks).strip()
+    def format_context(self, prompt: str, documents: list[Document], deterministic: bool = False) -> PackedContext:
+        return self.context_packer.pack(prompt, documents, deterministic=deterministic)
 
     def format_sources(self, documents: list[Document]) -> list[dict[str, Any]]:
         sources: list[dict[str, Any]] = []
@@ -599,29 +1630,61 @@ class PortfolioAssistantService:
 
     def _build_grounded_prompt(self, prompt: str, context: str) -> str:
         return (
-            "Use the verified portfolio context below to answer the visitor.\n"
-            "If the answer is not supported by the context, say you do not have confirmed information yet.\n"
-            "Never pretend to be Manuj. You are his assistant.\n\n"
+            f"{GROUNDING_RULES}\n\n"
             f"Verified context:\n{context}\n\n"
             f"Visitor question:\n{prompt}"
         )
 
-    def build_input_items(self, prompt: str, messages: list[dict[str, str]], context: str) -> list[dict[str, Any]]:
-        input_items: list[dict[str, Any]] = []
-        for message in messages[-self.config.max_history_messages :]:
-            input_items.append(
-                {
-                    "role": message["role"],
-                    "content": [{"type": "input_text", "text": message["content"]}],
-                }
+    def _input_item(self, role: str, text: str) -> dict[str, Any]:
+        return {"role": role, "content": [{"type": "input_text", "text": text}]}
+
+    def _history_items(self, messages: list[dict[str, str]], history_summary: str) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        if history_summary:
+            items.append(
+                self._input_item("developer", f"Summary of earlier turns in this conversation:\n{history_summary}")
             )
-        input_items.append(
-            {
-                "role": "user",
-                "content": [{"type": "input_text", "text": self._build_grounded_prompt(prompt, context)}],
-            }
-        )
-        return input_items
+        for message in messages[-self.config.max_history_messages :]:
+            items.append(self._input_item(message["role"], message["content"]))
+        return items
+
+    def build_input_items(
+        self,
+        prompt: str,
+        messages: list[dict[str, str]],
+        context: str,
+        history_summary: str = "",
+        shared_context: str = "",
+    ) -> list[dict[str, Any]]:
+        if self.config.prompt_layout == "stable":
+            return self._build_stable_input_items(prompt, messages, context, history_summary, shared_context)
+        return [
+            *self._history_items(messages, history_summary),
+            self._input_item("user", self._build_grounded_prompt(prompt, context)),
+        ]
+
+    def _build_stable_input_items(
+        self,
+        prompt: str,
+        messages: list[dict[str, str]],
+        context: str,
+        history_summary: str,
+        shared_context: str,
+    ) -> list[dict[str, Any]]:
+        # Most stable first: the rules and the shared portfolio context are the
+        # same for every request, so together with the instructions they form
+        # a prefix the provider can cache. History and the question come last.
+        if shared_context:
+            grounding = f"{GROUNDING_RULES}\n\nVerified portfolio context:\n{shared_context}"
+            question = f"Additional verified context:\n{context}\n\n" if context else ""
+        else:
+            grounding = f"{GROUNDING_RULES}\n\nVerified context:\n{context}"
+            question = ""
+        return [
+            self._input_item("developer", grounding),
+            *self._history_items(messages, history_summary),
+            self._input_item("user", f"{question}Visitor question:\n{prompt}"),
+        ]
 
     def build_openai_request(
         self,
@@ -629,16 +1692,25 @@ class PortfolioAssistantService:
         request_id: str,
         context: str,
         stream: bool,
+        snapshot: KnowledgeSnapshot | None = None,
+        shared_context: str = "",
     ) -> dict[str, Any]:
         self._require_openai_setup()
+        snapshot = snapshot or self.snapshot
         metadata = {"request_id": request_id, "app": "portfolio-assistant"}
         if chat_request.session_id:
             metadata["session_id"] = chat_request.session_id[:64]
 
         return {
             "model": chat_request.model,
-            "instructions": self.system_instructions,
-            "input": self.build_input_items(chat_request.prompt, chat_request.messages, context),
+            "instructions": snapshot.system_instructions,
+            "input": self.build_input_items(
+                chat_request.prompt,
+                chat_request.messages,
+                context,
+                chat_request.history_summary,
+                shared_context,
+            ),
             "temperature": self.config.temperature,
             "max_output_tokens": self.config.max_output_tokens,
             "store": False,
@@ -647,19 +1719,47 @@ class PortfolioAssistantService:
             "stream": stream,
         }
 
-    def _response_usage(self, response: Any) -> dict[str, Any] | None:
+    def _response_usage(self, response: Any, record: bool = True) -> dict[str, Any] | None:
         usage = getattr(response, "usage", None)
         if usage is None:
             return None
         if hasattr(usage, "model_dump"):
-            return usage.model_dump()
-        if isinstance(usage, dict):
-            return usage
-        return {
-            key: getattr(usage, key)
-            for key in ("input_tokens", "output_tokens", "total_tokens")
-            if hasattr(usage, key)
-        }
+            usage_data = usage.model_dump()
+        elif isinstance(usage, dict):
+            usage_data = dict(usage)
+        else:
+            usage_data = {
+                key: getattr(usage, key)
+                for key in ("input_tokens", "output_tokens", "total_tokens", "input_tokens_details")
+                if hasattr(usage, key)
+            }
+
+        details = usage_data.get("input_tokens_details") or {}
+        if isinstance(details, dict):
+            cached_tokens = details.get("cached_tokens")
+        else:
+            cached_tokens = getattr(details, "cached_tokens", 0)
+        usage_data["cached_tokens"] = int(cached_tokens or 0)
+        if record:
+            self._record_prompt_cache_usage(int(usage_data.get("input_tokens") or 0), usage_data["cached_tokens"])
+        return usage_data
+
+    def _record_prompt_cache_usage(self, input_tokens: int, cached_tokens: int) -> None:
+        with self.state_lock:
+            self.prompt_cache_stats["requests"] += 1
+            self.prompt_cache_stats["input_tokens"] += input_tokens
+            self.prompt_cache_stats["cached_tokens"] += cached_tokens
+            if cached_tokens:
+                self.prompt_cache_stats["requests_with_cache_hits"] += 1
+
+    def prompt_cache_snapshot(self) -> dict[str, Any]:
+        with self.state_lock:
+            stats = dict(self.prompt_cache_stats)
+        stats["layout"] = self.config.prompt_layout
+        stats["cached_token_ratio"] = (
+            round(stats["cached_tokens"] / stats["input_tokens"], 4) if stats["input_tokens"] else 0.0
+        )
+        return stats
 
     def _response_text(self, response: Any) -> str:
         output_text = getattr(response, "output_text", None)
@@ -676,19 +1776,245 @@ class PortfolioAssistantService:
                     collected.append(getattr(part, "text", ""))
         return "".join(collected).strip()
 
+    def prepare_answer_context(self, chat_request: ChatRequestPayload) -> AnswerContext:
+        self.ensure_sources_ready()
+        snapshot = self.snapshot
+        query_embedding = self._try_embed_query(chat_request.prompt, snapshot)
+        return self.build_answer_context(chat_request, snapshot, query_embedding)
+
+    def build_answer_context(
+        self,
+        chat_request: ChatRequestPayload,
+        snapshot: KnowledgeSnapshot,
+        query_embedding: list[float] | None,
+    ) -> AnswerContext:
+        documents = self._search_sources(chat_request.prompt, query_embedding, snapshot)
+
+        shared_context = ""
+        context_documents = documents
+        if self.config.prompt_layout == "stable" and snapshot.shared_context:
+            shared_context = snapshot.shared_context
+            context_documents = [
+                document for document in documents if document.metadata.get("source_type") != "portfolio_xml"
+            ]
+        packed = self.format_context(
+            chat_request.prompt,
+            context_documents,
+            deterministic=self.config.prompt_layout == "stable",
+        )
+        return AnswerContext(
+            documents=documents,
+            context=packed.text,
+            sources=self.format_sources(documents),
+            snapshot=snapshot,
+            query_embedding=query_embedding,
+            context_tokens=packed.tokens,
+            uncompressed_context_tokens=packed.uncompressed_tokens,
+            shared_context=shared_context,
+        )
+
+    def _usage_with_context_savings(
+        self,
+        usage: dict[str, Any] | None,
+        answer_context: AnswerContext,
+    ) -> dict[str, Any]:
+        return {
+            **(usage or {}),
+            "context_tokens": answer_context.context_tokens,
+            "uncompressed_context_tokens": answer_context.uncompressed_context_tokens,
+            "saved_input_tokens": max(
+                0,
+                answer_context.uncompressed_context_tokens - answer_context.context_tokens,
+            ),
+        }
+
+    def _answer_cache_scope(self, chat_request: ChatRequestPayload, answer_context: AnswerContext) -> tuple[str, ...]:
+        # The prompt is matched separately (exactly or by embedding similarity);
+        # everything else that shapes the answer must match exactly.
+        def digest(value: str) -> str:
+            return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+        return (
+            chat_request.model,
+            digest(answer_context.snapshot.system_instructions),
+            digest(answer_context.shared_context),
+            digest(answer_context.context),
+            digest(json.dumps(chat_request.messages, sort_keys=True, ensure_ascii=False)),
+            digest(chat_request.history_summary),
+        )
+
+    def _lookup_cached_answer(
+        self,
+        chat_request: ChatRequestPayload,
+        answer_context: AnswerContext,
+    ) -> dict[str, Any] | None:
+        return self.answer_cache.get(
+            chat_request.prompt,
+            self._answer_cache_scope(chat_request, answer_context),
+            answer_context.query_embedding,
+        )
+
+    def _store_cached_answer(
+        self,
+        chat_request: ChatRequestPayload,
+        answer_context: AnswerContext,
+        response_text: str,
+        response_status: str,
+    ) -> None:
+        if response_status != "completed" or not response_text:
+            return
+        self.answer_cache.set(
+            chat_request.prompt,
+            self._answer_cache_scope(chat_request, answer_context),
+            answer_context.query_embedding,
+            {"response": response_text, "status": response_status},
+        )
+
+    def match_fast_answer(self, chat_request: ChatRequestPayload) -> FastAnswer | None:
+        facts = self.snapshot.portfolio_facts
+        if not self.config.enable_fast_path or facts is None:
+            return None
+        fast_answer = facts.answer(chat_request.prompt)
+        if fast_answer is not None:
+            with self.state_lock:
+                self.fast_path_answers += 1
+        return fast_answer
+
+    def format_fast_answer_sources(self, fast_answer: FastAnswer) -> list[dict[str, Any]]:
+        return self.format_sources(
+            [
+                Document(
+                    page_content=section_text,
+                    metadata={
+                        "source_type": "portfolio_xml",
+                        "source_id": f"portfolio:{section}",
+                        "title": f"Portfolio XML - {section.replace('_', ' ').title()}",
+                        "url": None,
+                    },
+                )
+                for section, section_text in fast_answer.sections.items()
+            ]
+        )
+
     def answer(self, chat_request: ChatRequestPayload, request_id: str) -> dict[str, Any]:
-        documents = self.retrieve_documents(chat_request.prompt)
-        context = self.format_context(documents)
-        sources = self.format_sources(documents)
+        result = self._answer(chat_request, request_id)
+        self._remember_turn(chat_request, result["response"])
+        return result
+
+    def _answer(self, chat_request: ChatRequestPayload, request_id: str) -> dict[str, Any]:
+        result = self.fast_answer_result(chat_request, request_id)
+        if result is not None:
+            return result
+
+        answer_context = self.shared_answer_context(chat_request)
+        result = self.cached_answer_result(chat_request, request_id, answer_context)
+        if result is not None:
+            return result
+
+        def create() -> Any:
+            return self.openai_client.responses.create(
+                **self.build_openai_request(
+                    chat_request,
+                    request_id,
+                    answer_context.context,
+                    stream=False,
+                    snapshot=answer_context.snapshot,
+                    shared_context=answer_context.shared_context,
+                )
+            )
+
+        if self.coalescer is None:
+            openai_response, shared = create(), False
+        else:
+            openai_response, shared = self.coalescer.do(self.coalescing_key(chat_request, "response"), create)
+        return self.answer_from_response(chat_request, request_id, answer_context, openai_response, shared)
+
+    def coalescing_key(self, chat_request: ChatRequestPayload, kind: str) -> tuple[str, ...]:
+        # Identical questions asked with the same history against the same
+        # knowledge snapshot get the same answer, so concurrent ones can share
+        # a single retrieval and model call.
+        history = json.dumps(
+            {"messages": chat_request.messages, "summary": chat_request.history_summary},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return (
+            kind,
+            str(self.snapshot.version),
+            chat_request.model,
+            normalize_prompt(chat_request.prompt),
+            hashlib.sha256(history.encode("utf-8")).hexdigest(),
+        )
 
-        openai_response = self.openai_client.responses.create(
-            **self.build_openai_request(chat_request, request_id, context, stream=False)
+    def shared_answer_context(self, chat_request: ChatRequestPayload) -> AnswerContext:
+        if self.coalescer is None:
+            return self.prepare_answer_context(chat_request)
+        answer_context, _ = self.coalescer.do(
+            self.coalescing_key(chat_request, "context"),
+            lambda: self.prepare_answer_context(chat_request),
         )
+        return answer_context
+
+    def fast_answer_result(self, chat_request: ChatRequestPayload, request_id: str) -> dict[str, Any] | None:
+        fast_answer = self.match_fast_answer(chat_request)
+        if fast_answer is not None:
+            sources = self.format_fast_answer_sources(fast_answer)
+            return {
+                "id": request_id,
+                "model": chat_request.model,
+                "response": fast_answer.text,
+                "tokens": 0,
+                "usage": None,
+                "cached": False,
+                "fast_path": fast_answer.intent,
+                "source_count": len(sources),
+                "sources": sources,
+            }
+        return None
+
+    def cached_answer_result(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+    ) -> dict[str, Any] | None:
+        sources = answer_context.sources
+        cached = self._lookup_cached_answer(chat_request, answer_context)
+        if cached is not None:
+            return {
+                "id": request_id,
+                "model": chat_request.model,
+                "response": cached["response"],
+                "tokens": 0,
+                "usage": None,
+                "cached": True,
+                "source_count": len(sources),
+                "sources": sources,
+            }
+        return None
+
+    def answer_from_response(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+        openai_response: Any,
+        shared: bool = False,
+    ) -> dict[str, Any]:
+        sources = answer_context.sources
         answer_text = self._response_text(openai_response).strip()
-        usage = self._response_usage(openai_response)
+        usage = self._response_usage(openai_response, record=not shared)
         total_tokens = int((usage or {}).get("total_tokens", 0))
-
-        if not answer_text:
+        usage = self._usage_with_context_savings(usage, answer_context)
+
+        if answer_text:
+            self._store_cached_answer(
+                chat_request,
+                answer_context,
+                answer_text,
+                getattr(openai_response, "status", "completed") or "completed",
+            )
+        else:
             answer_text = "I do not have confirmed information for that yet."
 
         return {
@@ -697,6 +2023,7 @@ class PortfolioAssistantService:
             "response": answer_text,
             "tokens": total_tokens,
             "usage": usage,
+            "cached": False,
             "source_count": len(sources),
             "sources": sources,
         }
@@ -704,12 +2031,37 @@ class PortfolioAssistantService:
     def _sse(self, event_name: str, data: dict[str, Any]) -> str:
         return f"event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    def stream_answer(self, chat_request: ChatRequestPayload, request_id: str):
-        documents = self.retrieve_documents(chat_request.prompt)
-        context = self.format_context(documents)
-        sources = self.format_sources(documents)
+    def _replay_answer(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        text: str,
+        sources: list[dict[str, Any]],
+        status: str = "completed",
+        **extra: Any,
+    ):
+        for start in range(0, len(text), CACHED_REPLAY_CHUNK_CHARS):
+            chunk = text[start : start + CACHED_REPLAY_CHUNK_CHARS]
+            yield self._sse("delta", {"id": request_id, "text": chunk})
+        self._remember_turn(chat_request, text)
 
         yield self._sse(
+            "done",
+            {
+                "id": request_id,
+                "model": chat_request.model,
+                "status": status,
+                "response": text,
+                "tokens": 0,
+                "usage": None,
+                **extra,
+                "source_count": len(sources),
+                "sources": sources,
+            },
+        )
+
+    def meta_event(self, chat_request: ChatRequestPayload, request_id: str, sources: list[dict[str, Any]]) -> str:
+        return self._sse(
             "meta",
             {
                 "id": request_id,
@@ -719,63 +2071,156 @@ class PortfolioAssistantService:
             },
         )
 
-        stream = self.openai_client.responses.create(
-            **self.build_openai_request(chat_request, request_id, context, stream=True)
+    def fast_answer_stream(self, chat_request: ChatRequestPayload, request_id: str) -> Iterator[str] | None:
+        fast_answer = self.match_fast_answer(chat_request)
+        if fast_answer is None:
+            return None
+        sources = self.format_fast_answer_sources(fast_answer)
+        return itertools.chain(
+            [self.meta_event(chat_request, request_id, sources)],
+            self._replay_answer(
+                chat_request,
+                request_id,
+                fast_answer.text,
+                sources,
+                cached=False,
+                fast_path=fast_answer.intent,
+            ),
         )
-        collected_text: list[str] = []
-        final_response = None
 
-        try:
-            for event in stream:
-                event_type = getattr(event, "type", "")
-
-                if event_type == "response.output_text.delta":
-                    delta = getattr(event, "delta", "")
-                    if delta:
-                        collected_text.append(delta)
-                        yield self._sse("delta", {"id": request_id, "text": delta})
-                    continue
+    def cached_answer_stream(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+    ) -> Iterator[str] | None:
+        cached = self._lookup_cached_answer(chat_request, answer_context)
+        if cached is None:
+            return None
+        return self._replay_answer(
+            chat_request,
+            request_id,
+            cached["response"],
+            answer_context.sources,
+            status=cached["status"],
+            cached=True,
+        )
 
-                if event_type == "response.completed":
-                    final_response = event.response
-                    continue
+    def read_stream_event(self, request_id: str, event: Any, collected_text: list[str]) -> tuple[str | None, Any]:
+        event_type = getattr(event, "type", "")
 
-                if event_type == "response.incomplete":
-                    final_response = event.response
-                    continue
+        if event_type == "response.output_text.delta":
+            delta = getattr(event, "delta", "")
+            if delta:
+                collected_text.append(delta)
+                return self._sse("delta", {"id": request_id, "text": delta}), None
+            return None, None
 
-                if event_type == "response.failed":
-                    final_response = event.response
-                    error_message = getattr(getattr(final_response, "error", None), "message", None)
-                    raise RuntimeError(error_message or "OpenAI response failed.")
+        if event_type in {"response.completed", "response.incomplete"}:
+            return None, event.response
 
-            response_text = "".join(collected_text).strip()
-            usage = None
-            response_status = "completed"
+        if event_type == "response.failed":
+            error_message = getattr(getattr(event.response, "error", None), "message", None)
+            raise RuntimeError(error_message or "OpenAI response failed.")
 
-            if final_response is not None:
-                response_text = self._response_text(final_response).strip() or response_text
-                usage = self._response_usage(final_response)
-                response_status = getattr(final_response, "status", "completed")
+        return None, None
 
-            if not response_text:
-                response_text = "I do not have confirmed information for that yet."
+    def stream_done_event(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+        collected_text: list[str],
+        final_response: Any,
+        shared: bool = False,
+    ) -> str:
+        response_text = "".join(collected_text).strip()
+        usage = None
+        response_status = "completed"
+
+        if final_response is not None:
+            response_text = self._response_text(final_response).strip() or response_text
+            usage = self._response_usage(final_response, record=not shared)
+            response_status = getattr(final_response, "status", "completed")
+        usage = self._usage_with_context_savings(usage, answer_context)
+
+        if response_text:
+            self._store_cached_answer(chat_request, answer_context, response_text, response_status)
+        else:
+            response_text = "I do not have confirmed information for that yet."
+        self._remember_turn(chat_request, response_text)
 
-            yield self._sse(
-                "done",
-                {
-                    "id": request_id,
-                    "model": chat_request.model,
-                    "status": response_status,
-                    "response": response_text,
-                    "tokens": int((usage or {}).get("total_tokens", 0)),
-                    "usage": usage,
-                    "source_count": len(sources),
-                    "sources": sources,
-                },
+        return self._sse(
+            "done",
+            {
+                "id": request_id,
+                "model": chat_request.model,
+                "status": response_status,
+                "response": response_text,
+                "tokens": int(usage.get("total_tokens", 0)),
+                "usage": usage,
+                "cached": False,
+                "source_count": len(answer_context.sources),
+                "sources": answer_context.sources,
+            },
+        )
+
+    def stream_answer(self, chat_request: ChatRequestPayload, request_id: str) -> Iterator[str]:
+        fast_stream = self.fast_answer_stream(chat_request, request_id)
+        if fast_stream is not None:
+            yield from fast_stream
+            return
+
+        answer_context = self.shared_answer_context(chat_request)
+        yield self.meta_event(chat_request, request_id, answer_context.sources)
+
+        cached_stream = self.cached_answer_stream(chat_request, request_id, answer_context)
+        if cached_stream is not None:
+            yield from cached_stream
+            return
+
+        def open_stream() -> Iterator[Any]:
+            stream = self.openai_client.responses.create(
+                **self.build_openai_request(
+                    chat_request,
+                    request_id,
+                    answer_context.context,
+                    stream=True,
+                    snapshot=answer_context.snapshot,
+                    shared_context=answer_context.shared_context,
+                )
+            )
+            try:
+                yield from stream
+            finally:
+                stream.close()
+
+        # Followers of a coalesced stream get the leader's upstream events and
+        # render them under their own request id.
+        if self.coalescer is None:
+            events, shared = open_stream(), False
+        else:
+            events, shared = self.coalescer.stream(self.coalescing_key(chat_request, "stream"), open_stream)
+        collected_text: list[str] = []
+        final_response = None
+
+        try:
+            for event in events:
+                message, response = self.read_stream_event(request_id, event, collected_text)
+                if response is not None:
+                    final_response = response
+                if message:
+                    yield message
+            yield self.stream_done_event(
+                chat_request,
+                request_id,
+                answer_context,
+                collected_text,
+                final_response,
+                shared,
             )
         finally:
-            stream.close()
+            events.close()
 
 
 CONFIG = load_config()
@@ -797,6 +2242,17 @@ def error_response(message: str, status_code: int, request_id: str | None = None
     return jsonify(payload), status_code
 
 
+def rejected_response(exc: AdmissionRejected, request_id: str):
+    logger.info("Request %s rejected (%s); retry after %ss.", request_id, exc.reason, exc.retry_after)
+    response, status_code = error_response(str(exc), exc.status_code, request_id)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, status_code
+
+
+def _client_address() -> str | None:
+    return assistant_service.client_address(request.remote_addr, request.headers.get("X-Forwarded-For"))
+
+
 @app.get("/")
 def home():
     return jsonify(
@@ -829,8 +2285,15 @@ def ask():
     try:
         body = request.get_json(silent=True) or {}
         chat_request = assistant_service.parse_chat_request(body)
-        result = assistant_service.answer(chat_request, request_id)
+        assistant_service.check_rate_limits(chat_request, _client_address())
+        slot = assistant_service.request_limiter.acquire()
+        try:
+            result = assistant_service.answer(chat_request, request_id)
+        finally:
+            slot.release()
         return jsonify(result)
+    except AdmissionRejected as exc:
+        return rejected_response(exc, request_id)
     except ValueError as exc:
         return error_response(str(exc), 400, request_id)
     except RuntimeError as exc:
@@ -849,6 +2312,10 @@ def ask_stream():
     try:
         body = request.get_json(silent=True) or {}
         chat_request = assistant_service.parse_chat_request(body)
+        assistant_service.check_rate_limits(chat_request, _client_address())
+        slot = assistant_service.request_limiter.acquire()
+    except AdmissionRejected as exc:
+        return rejected_response(exc, request_id)
     except ValueError as exc:
         return error_response(str(exc), 400, request_id)
 
@@ -867,16 +2334,62 @@ def ask_stream():
                     "error": "Unexpected server error while streaming the response.",
                 },
             )
+        finally:
+            slot.release()
 
     response = Response(stream_with_context(generate()), mimetype="text/event-stream")
     response.headers["Cache-Control"] = "no-cache, no-transform"
     response.headers["Connection"] = "keep-alive"
     response.headers["X-Accel-Buffering"] = "no"
+    # The slot is freed as soon as the stream ends. Closing the response covers
+    # clients that disconnect before the generator ever starts.
+    response.call_on_close(slot.release)
     return response
 
 
-assistant_service.load_startup_sources()
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manuj Portfolio Assistant API")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("serve", help="Run the development server (default).")
+    build_parser = subparsers.add_parser(
+        "build-index",
+        help="Build persistent FAISS index artifacts into INDEX_CACHE_DIR without serving.",
+    )
+    build_parser.add_argument("--source", choices=["all", "portfolio", "website"], default="all")
+    benchmark_parser = subparsers.add_parser(
+        "benchmark-compact",
+        help="Compare compact index recall and latency against an exact FAISS flat index.",
+    )
+    benchmark_parser.add_argument("--source", choices=["portfolio", "website"], default="portfolio")
+    benchmark_parser.add_argument("--queries", type=int, default=200)
+    benchmark_parser.add_argument(
+        "--questions",
+        help=(
+            "Text file with one real question per line. Their embeddings are used as queries "
+            "instead of perturbed chunk vectors."
+        ),
+    )
+    extractor_parser = subparsers.add_parser(
+        "benchmark-extractors",
+        help="Compare HTML extractor throughput and output parity over saved HTML pages.",
+    )
+    extractor_parser.add_argument("--fixtures", default=os.path.join(BASE_DIR, "benchmarks", "html"))
+    extractor_parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "build-index":
+        return assistant_service.build_index_artifacts(args.source)
+    if args.command == "benchmark-compact":
+        return assistant_service.benchmark_compact_index(args.source, args.queries, args.questions)
+    if args.command == "benchmark-extractors":
+        return assistant_service.benchmark_html_extractors(args.fixtures, args.repeat)
+
+    assistant_service.load_startup_sources()
+    app.run(debug=True, host="0.0.0.0", port=5000)
+    return 0
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    raise SystemExit(main())
+else:
+    assistant_service.load_startup_sources()
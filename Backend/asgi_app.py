@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, AsyncIterator, Awaitable
+
+import uvicorn
+from openai import AsyncOpenAI
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from app import (
+    APP_VERSION,
+    CONFIG,
+    AnswerContext,
+    ChatRequestPayload,
+    KnowledgeSnapshot,
+    PortfolioAssistantService,
+    assistant_service,
+)
+from admission import AdmissionRejected, AdmissionSlot, AsyncConcurrencyLimiter
+from coalescing import AsyncSingleFlight
+
+
+logger = logging.getLogger("portfolio-assistant.asgi")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+class AsyncAnswerService:
+    def __init__(self, service: PortfolioAssistantService) -> None:
+        self.service = service
+        self.config = service.config
+        self.openai_client = (
+            AsyncOpenAI(timeout=self.config.request_timeout_seconds)
+            if self.config.openai_api_key
+            else None
+        )
+        self.coalescer = (
+            AsyncSingleFlight(self.config.request_timeout_seconds)
+            if self.config.enable_request_coalescing
+            else None
+        )
+        self.request_limiter = AsyncConcurrencyLimiter(
+            self.config.max_concurrent_requests,
+            self.config.max_queued_requests,
+            self.config.queue_timeout_seconds,
+        )
+
+    async def _try_embed_query(self, prompt: str, snapshot: KnowledgeSnapshot) -> list[float] | None:
+        service = self.service
+        if not service._needs_query_embedding(snapshot):
+            return None
+
+        cache_key = service._query_embedding_key(prompt)
+        cached = service.query_embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            embedding = await service.embeddings.aembed_query(prompt)
+        except Exception as exc:
+            service._query_embedding_failed(exc)
+            return None
+        service.query_embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    async def prepare_answer_context(self, chat_request: ChatRequestPayload) -> AnswerContext:
+        if not self.service.has_ready_source():
+            # Warm-up crawls and embeds synchronously; keep it off the loop.
+            await asyncio.to_thread(self.service.ensure_sources_ready)
+        snapshot = self.service.snapshot
+        query_embedding = await self._try_embed_query(chat_request.prompt, snapshot)
+        # Index search and context packing are CPU-bound but short.
+        return await asyncio.to_thread(
+            self.service.build_answer_context,
+            chat_request,
+            snapshot,
+            query_embedding,
+        )
+
+    async def shared_answer_context(self, chat_request: ChatRequestPayload) -> AnswerContext:
+        if self.coalescer is None:
+            return await self.prepare_answer_context(chat_request)
+        answer_context, _ = await self.coalescer.do(
+            self.service.coalescing_key(chat_request, "context"),
+            lambda: self.prepare_answer_context(chat_request),
+        )
+        return answer_context
+
+    def _openai_request(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+        stream: bool,
+    ) -> dict[str, Any]:
+        return self.service.build_openai_request(
+            chat_request,
+            request_id,
+            answer_context.context,
+            stream=stream,
+            snapshot=answer_context.snapshot,
+            shared_context=answer_context.shared_context,
+        )
+
+    async def answer(self, chat_request: ChatRequestPayload, request_id: str) -> dict[str, Any]:
+        service = self.service
+        result = service.fast_answer_result(chat_request, request_id)
+        if result is None:
+            answer_context = await self.shared_answer_context(chat_request)
+            result = service.cached_answer_result(chat_request, request_id, answer_context)
+            if result is None:
+                openai_response, shared = await self._create_response(chat_request, request_id, answer_context)
+                result = service.answer_from_response(
+                    chat_request,
+                    request_id,
+                    answer_context,
+                    openai_response,
+                    shared,
+                )
+
+        # The SQLite session store writes to disk; keep that off the loop too.
+        await asyncio.to_thread(service._remember_turn, chat_request, result["response"])
+        return result
+
+    async def _create_response(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+    ) -> tuple[Any, bool]:
+        def create() -> Awaitable[Any]:
+            return self.openai_client.responses.create(
+                **self._openai_request(chat_request, request_id, answer_context, stream=False)
+            )
+
+        if self.coalescer is None:
+            return await create(), False
+        return await self.coalescer.do(self.service.coalescing_key(chat_request, "response"), create)
+
+    def _open_response_stream(
+        self,
+        chat_request: ChatRequestPayload,
+        request_id: str,
+        answer_context: AnswerContext,
+    ) -> tuple[AsyncIterator[Any], bool]:
+        async def open_stream() -> AsyncIterator[Any]:
+            stream = await self.openai_client.responses.create(
+                **self._openai_request(chat_request, request_id, answer_context, stream=True)
+            )
+            try:
+                async for event in stream:
+                    yield event
+            finally:
+                # Also runs when the stream is cancelled, so the upstream
+                # connection is released right away.
+                await stream.close()
+
+        if self.coalescer is None:
+            return open_stream(), False
+        return self.coalescer.stream(self.service.coalescing_key(chat_request, "stream"), open_stream)
+
+    async def stream_answer(self, chat_request: ChatRequestPayload, request_id: str) -> AsyncIterator[str]:
+        service = self.service
+        fast_stream = service.fast_answer_stream(chat_request, request_id)
+        if fast_stream is not None:
+            # Replays are already-known text but remember the turn at the end,
+            # so they are drained on a thread.
+            for message in await asyncio.to_thread(list, fast_stream):
+                yield message
+            return
+
+        answer_context = await self.shared_answer_context(chat_request)
+        yield service.meta_event(chat_request, request_id, answer_context.sources)
+
+        cached_stream = service.cached_answer_stream(chat_request, request_id, answer_context)
+        if cached_stream is not None:
+            for message in await asyncio.to_thread(list, cached_stream):
+                yield message
+            return
+
+        events, shared = self._open_response_stream(chat_request, request_id, answer_context)
+        collected_text: list[str] = []
+        final_response = None
+
+        try:
+            async for event in events:
+                message, response = service.read_stream_event(request_id, event, collected_text)
+                if response is not None:
+                    final_response = response
+                if message:
+                    yield message
+            yield await asyncio.to_thread(
+                service.stream_done_event,
+                chat_request,
+                request_id,
+                answer_context,
+                collected_text,
+                final_response,
+                shared,
+            )
+        finally:
+            await events.aclose()
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    def __init__(self, content: AsyncIterator[str], slot: AdmissionSlot, **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Released here rather than in the generator: a client that disconnects
+        # before the first event never starts the generator at all.
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+
+async_service = AsyncAnswerService(assistant_service)
+
+
+def error_response(message: str, status_code: int, request_id: str | None = None) -> JSONResponse:
+    payload = {"error": message}
+    if request_id:
+        payload["id"] = request_id
+    return JSONResponse(payload, status_code=status_code)
+
+
+def rejected_response(exc: AdmissionRejected, request_id: str) -> JSONResponse:
+    logger.info("Request %s rejected (%s); retry after %ss.", request_id, exc.reason, exc.retry_after)
+    response = error_response(str(exc), exc.status_code, request_id)
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def _client_address(request: Request) -> str | None:
+    return assistant_service.client_address(
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for"),
+    )
+
+
+async def _request_body(request: Request) -> Any:
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+async def home(request: Request) -> JSONResponse:
+    return JSONResponse(
+        {
+            "name": "Manuj AI Assistant API",
+            "version": APP_VERSION,
+            "ready": assistant_service.is_ready(),
+            "endpoints": ["/health", "/ready", "/ask", "/ask/stream"],
+        }
+    )
+
+
+def _health_snapshot() -> dict[str, Any]:
+    snapshot = assistant_service.health_snapshot()
+    if async_service.coalescer is not None:
+        snapshot["request_coalescing"] = async_service.coalescer.stats()
+    snapshot["admission"]["concurrency"] = async_service.request_limiter.stats()
+    return snapshot
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse(_health_snapshot())
+
+
+async def ready(request: Request) -> JSONResponse:
+    snapshot = _health_snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+async def ask(request: Request) -> JSONResponse:
+    request_id = uuid.uuid4().hex
+
+    try:
+        # Resolving a session id loads its history from the session store.
+        body = await _request_body(request)
+        chat_request = await asyncio.to_thread(assistant_service.parse_chat_request, body)
+        assistant_service.check_rate_limits(chat_request, _client_address(request))
+        slot = await async_service.request_limiter.acquire()
+        try:
+            result = await async_service.answer(chat_request, request_id)
+        finally:
+            slot.release()
+        return JSONResponse(result)
+    except AdmissionRejected as exc:
+        return rejected_response(exc, request_id)
+    except ValueError as exc:
+        return error_response(str(exc), 400, request_id)
+    except RuntimeError as exc:
+        logger.warning("Request %s failed with runtime error: %s", request_id, exc)
+        return error_response(str(exc), 503, request_id)
+    except Exception as exc:
+        logger.exception("Unhandled error while serving /ask request %s: %s", request_id, exc)
+        return error_response("Unexpected server error while generating the response.", 500, request_id)
+
+
+async def ask_stream(request: Request) -> AdmittedStreamingResponse | JSONResponse:
+    request_id = uuid.uuid4().hex
+
+    try:
+        body = await _request_body(request)
+        chat_request = await asyncio.to_thread(assistant_service.parse_chat_request, body)
+        assistant_service.check_rate_limits(chat_request, _client_address(request))
+        slot = await async_service.request_limiter.acquire()
+    except AdmissionRejected as exc:
+        return rejected_response(exc, request_id)
+    except ValueError as exc:
+        return error_response(str(exc), 400, request_id)
+
+    async def generate() -> AsyncIterator[str]:
+        try:
+            async for message in async_service.stream_answer(chat_request, request_id):
+                yield message
+        except RuntimeError as exc:
+            logger.warning("Streaming request %s failed: %s", request_id, exc)
+            yield assistant_service._sse("error", {"id": request_id, "error": str(exc)})
+        except Exception as exc:
+            logger.exception("Unhandled streaming error for request %s: %s", request_id, exc)
+            yield assistant_service._sse(
+                "error",
+                {
+                    "id": request_id,
+                    "error": "Unexpected server error while streaming the response.",
+                },
+            )
+
+    return AdmittedStreamingResponse(generate(), slot, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+app = Starlette(
+    routes=[
+        Route("/", home, methods=["GET"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/ready", ready, methods=["GET"]),
+        Route("/ask", ask, methods=["POST"]),
+        Route("/chat", ask, methods=["POST"]),
+        Route("/ask/stream", ask_stream, methods=["POST"]),
+        Route("/chat/stream", ask_stream, methods=["POST"]),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=CONFIG.cors_origins,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    ],
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manuj Portfolio Assistant API (async mode)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    args = parser.parse_args(argv)
+
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
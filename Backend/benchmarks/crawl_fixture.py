@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_loader import WebsitePage, crawl_website_pages  # noqa: E402
+
+
+# A small linked site served by a threaded http.server on 127.0.0.1. Running
+# this file crawls it with the concurrent crawler and checks the pages it
+# returns, the per-host concurrency cap, the crawl deadline, and 304 reuse on
+# a second crawl. It exits 1 when a check fails.
+PAGE_DELAY_SECONDS = 0.2
+SLOW_PAGE_DELAY_SECONDS = 3.0
+PER_HOST_LIMIT = 2
+DEADLINE_SECONDS = 1.5
+
+
+def _page(title: str, body: str, links: list[str]) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<nav>Site menu</nav><main><h1>{title}</h1><p>{body}</p><p>{anchors}</p></main>"
+        f"<footer>Footer text</footer></body></html>"
+    )
+
+
+PAGES = {
+    "/": _page("Home", "Welcome to the fixture portfolio.", ["/about", "/projects", "/contact"]),
+    "/about": _page("About", "Manuj builds web applications.", ["/", "/projects"]),
+    "/projects": _page("Projects", "A list of projects.", ["/projects/alpha", "/projects/beta", "/slow"]),
+    "/projects/alpha": _page("Alpha", "Alpha is a dashboard built with React.", ["/projects"]),
+    "/projects/beta": _page("Beta", "Beta is an ERP module built with ASP.NET.", ["/projects"]),
+    "/contact": _page("Contact", "Reach out by email.", ["/"]),
+    "/slow": _page("Slow", "This page takes a long time to respond.", ["/"]),
+}
+FAST_PATHS = [path for path in PAGES if path != "/slow"]
+
+
+class FixtureState:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests: dict[str, int] = {}
+        self.not_modified = 0
+        self.slow_delay = SLOW_PAGE_DELAY_SECONDS
+
+    def reset(self) -> None:
+        with self.lock:
+            self.peak_in_flight = 0
+            self.requests.clear()
+            self.not_modified = 0
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    state: FixtureState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return None
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        if path not in PAGES:
+            self.send_error(404)
+            return
+
+        state = self.state
+        with state.lock:
+            state.in_flight += 1
+            state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+            state.requests[path] = state.requests.get(path, 0) + 1
+        try:
+            time.sleep(state.slow_delay if path == "/slow" else PAGE_DELAY_SECONDS)
+            body = PAGES[path].encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+def start_fixture_site(port: int = 0) -> tuple[ThreadingHTTPServer, FixtureState, str]:
+    state = FixtureState()
+    handler = type("BoundFixtureHandler", (FixtureHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="crawl-fixture", daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _crawl(base_url: str, **options: Any) -> tuple[list[WebsitePage], float]:
+    started = time.perf_counter()
+    pages = crawl_website_pages(
+        base_url,
+        max_pages=len(PAGES),
+        concurrency=8,
+        per_host_limit=PER_HOST_LIMIT,
+        use_sitemap=False,
+        respect_robots=False,
+        html_extractor="html.parser",
+        **options,
+    )
+    return pages, time.perf_counter() - started
+
+
+def run_checks(base_url: str, state: FixtureState) -> dict[str, Any]:
+    checks: dict[str, bool] = {}
+
+    # 1. Full crawl: every page once, clean text, same-site links, cap held.
+    state.slow_delay = PAGE_DELAY_SECONDS
+    pages, full_seconds = _crawl(base_url)
+    by_url = {page.url: page for page in pages}
+    expected_urls = {base_url + ("" if path == "/" else path) for path in PAGES}
+    checks["all_pages_crawled"] = set(by_url) == expected_urls
+    checks["each_page_fetched_once"] = all(count == 1 for count in state.requests.values())
+    alpha = by_url.get(base_url + "/projects/alpha")
+    checks["page_content_extracted"] = (
+        alpha is not None
+        and alpha.title == "Alpha"
+        and "Alpha is a dashboard built with React." in alpha.text
+        and "Footer text" not in alpha.text
+        and "Site menu" not in alpha.text
+        and alpha.links == [base_url + "/projects"]
+        and alpha.etag is not None
+    )
+    checks["per_host_cap_respected"] = state.peak_in_flight <= PER_HOST_LIMIT
+    checks["per_host_cap_used"] = state.peak_in_flight == PER_HOST_LIMIT
+    full_peak = state.peak_in_flight
+
+    # 2. Recrawl with the previous pages: every page comes back 304 and is
+    # reused as-is with a fresh fetch time.
+    state.reset()
+    previous = {page.url: page for page in pages}
+    recrawled, _ = _crawl(base_url, previous_pages=previous)
+    checks["not_modified_reused"] = (
+        state.not_modified == len(PAGES)
+        and [(page.url, page.text, page.links) for page in recrawled]
+        == [(page.url, page.text, page.links) for page in pages]
+        and all(page.fetched_at > previous[page.url].fetched_at for page in recrawled)
+    )
+
+    # 3. Deadline: the slow page cannot finish in time, so the crawl returns
+    # near the deadline with everything else.
+    state.reset()
+    state.slow_delay = SLOW_PAGE_DELAY_SECONDS
+    limited, deadline_seconds = _crawl(base_url, deadline_seconds=DEADLINE_SECONDS)
+    limited_urls = {page.url for page in limited}
+    checks["deadline_returns_on_time"] = deadline_seconds < DEADLINE_SECONDS + 0.5
+    checks["deadline_keeps_finished_pages"] = limited_urls == {
+        base_url + ("" if path == "/" else path) for path in FAST_PATHS
+    }
+
+    return {
+        "pages": len(pages),
+        "full_crawl_seconds": round(full_seconds, 2),
+        "peak_requests_in_flight": full_peak,
+        "per_host_limit": PER_HOST_LIMIT,
+        "deadline_crawl_seconds": round(deadline_seconds, 2),
+        "deadline_seconds": DEADLINE_SECONDS,
+        "checks": checks,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Crawl a local fixture site and check the crawler's behaviour")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server, state, base_url = start_fixture_site(args.port)
+    try:
+        report = run_checks(base_url, state)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(json.dumps(report, indent=2))
+    return 0 if all(report["checks"].values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
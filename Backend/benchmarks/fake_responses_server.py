@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+# Stands in for the OpenAI Responses and Embeddings APIs when load-testing the
+# server locally: point OPENAI_BASE_URL at http://127.0.0.1:<port>/v1.
+ANSWER_TEXT = "Manuj is a software engineer who builds retrieval systems and data-heavy web applications."
+EMBEDDING_DIMENSIONS = 64
+DELTA_DELAY_SECONDS = 0.05
+
+
+def _fake_embedding(value: Any) -> list[float]:
+    digest = hashlib.sha256(json.dumps(value).encode("utf-8")).digest()
+    return [(digest[index % len(digest)] - 128) / 128 for index in range(EMBEDDING_DIMENSIONS)]
+
+
+def _response_object(response_id: str, model: str, text: str) -> dict[str, Any]:
+    output_tokens = len(text.split())
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [
+            {
+                "id": f"msg_{response_id}",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": 100,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": 100 + output_tokens,
+        },
+    }
+
+
+def _sse(payload: dict[str, Any]) -> str:
+    return f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def responses(request: Request) -> JSONResponse | StreamingResponse:
+    body = await request.json()
+    response_id = f"resp_{uuid.uuid4().hex}"
+    model = body.get("model", "gpt-4o")
+    delay = request.app.state.delta_delay
+    if not body.get("stream"):
+        await asyncio.sleep(delay * len(ANSWER_TEXT.split()))
+        return JSONResponse(_response_object(response_id, model, ANSWER_TEXT))
+
+    async def events() -> AsyncIterator[str]:
+        sequence = 0
+        for word in ANSWER_TEXT.split(" "):
+            await asyncio.sleep(delay)
+            sequence += 1
+            yield _sse(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": f"msg_{response_id}",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": f"{word} ",
+                    "sequence_number": sequence,
+                }
+            )
+        yield _sse(
+            {
+                "type": "response.completed",
+                "response": _response_object(response_id, model, ANSWER_TEXT),
+                "sequence_number": sequence + 1,
+            }
+        )
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def embeddings(request: Request) -> JSONResponse:
+    body = await request.json()
+    inputs = body.get("input", [])
+    if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    return JSONResponse(
+        {
+            "object": "list",
+            "model": body.get("model", ""),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": _fake_embedding(value)}
+                for index, value in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+    )
+
+
+app = Starlette(
+    routes=[
+        Route("/v1/responses", responses, methods=["POST"]),
+        Route("/v1/embeddings", embeddings, methods=["POST"]),
+    ],
+)
+app.state.delta_delay = DELTA_DELAY_SECONDS
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API for local load tests")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delta-delay", type=float, default=DELTA_DELAY_SECONDS)
+    args = parser.parse_args(argv)
+
+    app.state.delta_delay = args.delta_delay
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
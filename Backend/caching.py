@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    collapsed = " ".join(prompt.lower().split())
+    return _TRAILING_PUNCTUATION.sub("", collapsed)
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self.ttl_seconds > 0 and expires_at <= now:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (expires_at, value) in self._entries.items()
+                if self.ttl_seconds <= 0 or expires_at > now
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cosine_similarity(left: list[float], right: list[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    left_norm = math.sqrt(sum(a * a for a in left))
+    right_norm = math.sqrt(sum(b * b for b in right))
+    if not left_norm or not right_norm:
+        return 0.0
+    return dot / (left_norm * right_norm)
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float) -> None:
+        self.similarity_threshold = similarity_threshold
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self.semantic_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.enabled
+
+    def get(self, prompt: str, scope: Hashable, query_embedding: list[float] | None) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+
+        entry = self._cache.get((scope, normalize_prompt(prompt)))
+        if entry is not None:
+            return entry[1]
+        if query_embedding is None or self.similarity_threshold >= 1:
+            return None
+
+        best_value = None
+        best_score = self.similarity_threshold
+        for (entry_scope, _), (embedding, value) in self._cache.items():
+            if entry_scope != scope or embedding is None:
+                continue
+            score = cosine_similarity(query_embedding, embedding)
+            if score >= best_score:
+                best_value, best_score = value, score
+
+        if best_value is not None:
+            self.semantic_hits += 1
+        return best_value
+
+    def set(
+        self,
+        prompt: str,
+        scope: Hashable,
+        query_embedding: list[float] | None,
+        value: dict[str, Any],
+    ) -> None:
+        self._cache.set((scope, normalize_prompt(prompt)), (query_embedding, value))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "semantic_hits": self.semantic_hits,
+            "similarity_threshold": self.similarity_threshold,
+        }
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Iterator
+
+
+FOLLOWER_TIMEOUT_MESSAGE = "Timed out waiting for an identical request to finish."
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class StreamFanout:
+    def __init__(self, on_timeout: Callable[[], None] | None = None) -> None:
+        self.items: list[Any] = []
+        self.finished = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._on_timeout = on_timeout
+        self._condition = threading.Condition()
+
+    def publish(self, item: Any) -> None:
+        with self._condition:
+            self.items.append(item)
+            self._condition.notify_all()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        with self._condition:
+            self.finished = True
+            self.error = error
+            self._condition.notify_all()
+
+    def subscribe(self, timeout: float | None = None) -> Iterator[Any]:
+        # Counted right away rather than on first iteration, so the leader
+        # knows someone is waiting before the follower starts reading.
+        with self._condition:
+            self.subscribers += 1
+        return self._follow(timeout)
+
+    def _follow(self, timeout: float | None) -> Iterator[Any]:
+        # Late subscribers replay what was already published, then follow live.
+        try:
+            position = 0
+            while True:
+                with self._condition:
+                    # The deadline is per event, like the leader's own read
+                    # timeout, so a long but live stream is never cut off.
+                    ready = self._condition.wait_for(
+                        lambda: position < len(self.items) or self.finished,
+                        timeout,
+                    )
+                    pending = self.items[position:]
+                    finished, error = self.finished, self.error
+                if not ready:
+                    if self._on_timeout is not None:
+                        self._on_timeout()
+                    raise RuntimeError(FOLLOWER_TIMEOUT_MESSAGE)
+                position += len(pending)
+                yield from pending
+                if finished and position >= len(self.items):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+
+class SingleFlight:
+    def __init__(self, follower_timeout: float | None = None) -> None:
+        self.follower_timeout = follower_timeout
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._streams: dict[Hashable, StreamFanout] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.follower_timeouts = 0
+
+    def _join(self, key: Hashable) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.followers += 1
+                return call, True
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, False
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> None:
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        call, shared = self._join(key)
+        if shared:
+            if not call.wait(self.follower_timeout):
+                # A hung leader must not hold its followers past the request
+                # timeout they would have had on their own.
+                self._follower_timed_out()
+                raise RuntimeError(FOLLOWER_TIMEOUT_MESSAGE)
+        else:
+            self._run(key, call, fn)
+        if call.error is not None:
+            raise call.error
+        return call.result, shared
+
+    def _follower_timed_out(self) -> None:
+        with self._lock:
+            self.follower_timeouts += 1
+
+    def start(self, key: Hashable, fn: Callable[[], Any], name: str) -> tuple[_Call, bool]:
+        # Like do(), but the work runs on its own daemon thread and the caller
+        # decides how long to wait for it.
+        call, shared = self._join(key)
+        if not shared:
+            threading.Thread(target=self._run, args=(key, call, fn), name=name, daemon=True).start()
+        return call, shared
+
+    def running(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stream(self, key: Hashable, open_stream: Callable[[], Iterator[Any]]) -> tuple[Iterator[Any], bool]:
+        with self._lock:
+            fanout = self._streams.get(key)
+            if fanout is not None:
+                self.followers += 1
+                return fanout.subscribe(self.follower_timeout), True
+            fanout = self._streams[key] = StreamFanout(self._follower_timed_out)
+            self.leaders += 1
+        return self._lead(key, fanout, open_stream), False
+
+    def _lead(self, key: Hashable, fanout: StreamFanout, open_stream: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        source = None
+        try:
+            source = open_stream()
+            for item in source:
+                fanout.publish(item)
+                yield item
+            fanout.finish()
+        except GeneratorExit:
+            # The leader's client went away. Followers still need the rest of
+            # the stream, so keep reading it for them on this thread.
+            if fanout.subscribers and source is not None:
+                try:
+                    for item in source:
+                        fanout.publish(item)
+                    fanout.finish()
+                except Exception as exc:
+                    fanout.finish(exc)
+            else:
+                fanout.finish(RuntimeError("Shared response stream was abandoned."))
+            raise
+        except BaseException as exc:
+            fanout.finish(exc)
+            raise
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            if source is not None and hasattr(source, "close"):
+                source.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "follower_timeouts": self.follower_timeouts,
+                "in_flight": len(self._calls) + len(self._streams),
+            }
+
+
+class AsyncStreamFanout:
+    def __init__(self, on_timeout: Callable[[], None] | None = None) -> None:
+        self.items: list[Any] = []
+        self.finished = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._on_timeout = on_timeout
+        self.pump: asyncio.Task | None = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, item: Any) -> None:
+        async with self._changed:
+            self.items.append(item)
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException | None = None) -> None:
+        async with self._changed:
+            self.finished = True
+            self.error = error
+            self._changed.notify_all()
+
+    def subscribe(self, timeout: float | None = None) -> AsyncIterator[Any]:
+        return self._follow(timeout)
+
+    async def _follow(self, timeout: float | None) -> AsyncIterator[Any]:
+        # Counted once the generator runs, where the finally below is sure to
+        # undo it; a subscription that is never iterated is never counted.
+        self.subscribers += 1
+        try:
+            position = 0
+            while True:
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: position < len(self.items) or self.finished),
+                            timeout,
+                        )
+                    except asyncio.TimeoutError:
+                        if self._on_timeout is not None:
+                            self._on_timeout()
+                        raise RuntimeError(FOLLOWER_TIMEOUT_MESSAGE) from None
+                    pending = self.items[position:]
+                    finished, error = self.finished, self.error
+                position += len(pending)
+                for item in pending:
+                    yield item
+                if finished and position >= len(self.items):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and self.pump is not None and not self.pump.done():
+                # Every listener disconnected; stop paying for the upstream call.
+                self.pump.cancel()
+
+
+class AsyncSingleFlight:
+    def __init__(self, follower_timeout: float | None = None) -> None:
+        self.follower_timeout = follower_timeout
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._streams: dict[Hashable, AsyncStreamFanout] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.follower_timeouts = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            try:
+                # Only this follower's wait is cancelled on timeout; the shared
+                # task keeps running for the leader and anyone else.
+                return await asyncio.wait_for(asyncio.shield(task), self.follower_timeout), True
+            except asyncio.TimeoutError:
+                self._follower_timed_out()
+                raise RuntimeError(FOLLOWER_TIMEOUT_MESSAGE) from None
+
+        # The shared work runs as its own task, so a cancelled leader request
+        # does not fail the requests waiting on it.
+        self.leaders += 1
+        task = self._calls[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), False
+
+    def _follower_timed_out(self) -> None:
+        self.follower_timeouts += 1
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        self._calls.pop(key, None)
+        if not task.cancelled():
+            # Retrieved here so an error nobody was left waiting for is not
+            # reported as "never retrieved".
+            task.exception()
+
+    def stream(
+        self,
+        key: Hashable,
+        open_stream: Callable[[], AsyncIterator[Any]],
+    ) -> tuple[AsyncIterator[Any], bool]:
+        fanout = self._streams.get(key)
+        if fanout is not None:
+            self.followers += 1
+            return fanout.subscribe(self.follower_timeout), True
+
+        self.leaders += 1
+        fanout = self._streams[key] = AsyncStreamFanout(self._follower_timed_out)
+
+        # The upstream stream is read by its own task, so a cancelled leader
+        # request does not cut off the followers.
+        async def pump() -> None:
+            source = open_stream()
+            try:
+                async for item in source:
+                    await fanout.publish(item)
+                await fanout.finish()
+            except asyncio.CancelledError:
+                await fanout.finish(RuntimeError("Shared response stream was abandoned."))
+                raise
+            except Exception as exc:
+                await fanout.finish(exc)
+            finally:
+                self._streams.pop(key, None)
+                await source.aclose()
+
+        fanout.pump = asyncio.get_running_loop().create_task(pump())
+        return fanout.subscribe(), False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": True,
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "follower_timeouts": self.follower_timeouts,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
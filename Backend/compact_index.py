@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import time
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+CODES_FILENAME = "codes.bin"
+VECTORS_FILENAME = "vectors.f32"
+DOCUMENTS_FILENAME = "documents.jsonl"
+LAYOUT_FILENAME = "compact.npz"
+SEARCH_BLOCK_ROWS = 8192
+
+
+def _fit_projection(vectors: np.ndarray, dimensions: int) -> tuple[np.ndarray, np.ndarray]:
+    mean = vectors.mean(axis=0)
+    centered = vectors - mean
+    _, _, components = np.linalg.svd(centered, full_matrices=False)
+    target = max(1, min(dimensions, components.shape[0]))
+    return mean.astype(np.float32), components[:target].T.astype(np.float32)
+
+
+# Candidates come from approximate L2 distance over PCA-reduced int8/float16
+# codes; only those rows are re-scored against the full float32 vectors. Loaded
+# indexes are memory-mapped, so worker processes share one page cache copy.
+class CompactVectorIndex:
+    def __init__(
+        self,
+        codes: np.ndarray,
+        scales: np.ndarray,
+        mean: np.ndarray,
+        projection: np.ndarray,
+        vectors: np.ndarray,
+        documents: list[Document] | None = None,
+        document_offsets: np.ndarray | None = None,
+        document_map: mmap.mmap | None = None,
+        rerank_candidates: int = 40,
+    ) -> None:
+        self.codes = codes
+        self.scales = scales
+        self.mean = mean
+        self.projection = projection
+        self.vectors = vectors
+        self.rerank_candidates = rerank_candidates
+        self._documents = documents
+        self._document_offsets = document_offsets
+        self._document_map = document_map
+        self._code_norms = self._dequantize_norms()
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        texts: list[str],
+        vectors: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        dimensions: int = 256,
+        dtype: str = "int8",
+        rerank_candidates: int = 40,
+    ) -> CompactVectorIndex:
+        full = np.asarray(vectors, dtype=np.float32)
+        mean, projection = _fit_projection(full, dimensions)
+        reduced = (full - mean) @ projection
+
+        if dtype == "float16":
+            codes = reduced.astype(np.float16)
+            scales = np.ones(reduced.shape[1], dtype=np.float32)
+        else:
+            scales = np.abs(reduced).max(axis=0) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(reduced / scales), -127, 127).astype(np.int8)
+
+        documents = [
+            Document(page_content=text, metadata=dict(metadata))
+            for text, metadata in zip(texts, metadatas)
+        ]
+        return cls(
+            codes=codes,
+            scales=scales.astype(np.float32),
+            mean=mean,
+            projection=projection,
+            vectors=full,
+            documents=documents,
+            rerank_candidates=rerank_candidates,
+        )
+
+    def _dequantize_norms(self) -> np.ndarray:
+        norms = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = self.codes[start : start + SEARCH_BLOCK_ROWS].astype(np.float32) * self.scales
+            norms[start : start + len(block)] = np.einsum("ij,ij->i", block, block)
+        return norms
+
+    def _document(self, position: int) -> Document:
+        if self._documents is not None:
+            return self._documents[position]
+        start = int(self._document_offsets[position])
+        end = int(self._document_offsets[position + 1])
+        record = json.loads(self._document_map[start:end])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def approximate_candidates(self, query_embedding: list[float], count: int) -> np.ndarray:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        reduced_query = (query - self.mean) @ self.projection
+        weighted_query = reduced_query * self.scales
+
+        distances = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = self.codes[start : start + SEARCH_BLOCK_ROWS].astype(np.float32)
+            dots = block @ weighted_query
+            distances[start : start + len(block)] = self._code_norms[start : start + len(block)] - 2 * dots
+
+        count = min(count, len(self))
+        if count >= len(self):
+            return np.argsort(distances)
+        candidates = np.argpartition(distances, count - 1)[:count]
+        return candidates[np.argsort(distances[candidates])]
+
+    def search_positions(self, embedding: list[float], k: int) -> tuple[np.ndarray, np.ndarray]:
+        candidates = np.sort(self.approximate_candidates(embedding, max(k, self.rerank_candidates)))
+        query = np.asarray(embedding, dtype=np.float32)
+        differences = np.asarray(self.vectors[candidates], dtype=np.float32) - query
+        exact = np.einsum("ij,ij->i", differences, differences)
+        order = np.argsort(exact)[:k]
+        return candidates[order], exact[order]
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        **_: Any,
+    ) -> list[tuple[Document, float]]:
+        if not len(self):
+            return []
+        positions, distances = self.search_positions(embedding, k)
+        return [
+            (self._document(int(position)), float(distance))
+            for position, distance in zip(positions, distances)
+        ]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def save_local(self, folder_path: str) -> None:
+        os.makedirs(folder_path, exist_ok=True)
+        np.ascontiguousarray(self.codes).tofile(os.path.join(folder_path, CODES_FILENAME))
+        np.ascontiguousarray(self.vectors, dtype=np.float32).tofile(os.path.join(folder_path, VECTORS_FILENAME))
+
+        offsets = [0]
+        with open(os.path.join(folder_path, DOCUMENTS_FILENAME), "wb") as handle:
+            for position in range(len(self)):
+                document = self._document(position)
+                line = json.dumps(
+                    {"page_content": document.page_content, "metadata": document.metadata},
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                handle.write(line + b"\n")
+                offsets.append(offsets[-1] + len(line) + 1)
+
+        np.savez(
+            os.path.join(folder_path, LAYOUT_FILENAME),
+            scales=self.scales,
+            mean=self.mean,
+            projection=self.projection,
+            offsets=np.asarray(offsets, dtype=np.int64),
+            shape=np.asarray([len(self), self.vectors.shape[1], self.codes.shape[1]], dtype=np.int64),
+            code_dtype=np.asarray(str(self.codes.dtype)),
+            rerank_candidates=np.asarray(self.rerank_candidates),
+        )
+
+    @classmethod
+    def load_local(cls, folder_path: str) -> CompactVectorIndex:
+        with np.load(os.path.join(folder_path, LAYOUT_FILENAME)) as layout:
+            rows, full_dimensions, code_dimensions = (int(value) for value in layout["shape"])
+            code_dtype = np.dtype(str(layout["code_dtype"]))
+            scales = layout["scales"]
+            mean = layout["mean"]
+            projection = layout["projection"]
+            offsets = layout["offsets"]
+            rerank_candidates = int(layout["rerank_candidates"])
+
+        codes = np.memmap(
+            os.path.join(folder_path, CODES_FILENAME),
+            dtype=code_dtype,
+            mode="r",
+            shape=(rows, code_dimensions),
+        )
+        vectors = np.memmap(
+            os.path.join(folder_path, VECTORS_FILENAME),
+            dtype=np.float32,
+            mode="r",
+            shape=(rows, full_dimensions),
+        )
+        with open(os.path.join(folder_path, DOCUMENTS_FILENAME), "rb") as handle:
+            document_map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(
+            codes=codes,
+            scales=scales,
+            mean=mean,
+            projection=projection,
+            vectors=vectors,
+            document_offsets=offsets,
+            document_map=document_map,
+            rerank_candidates=rerank_candidates,
+        )
+
+    def memory_footprint(self) -> dict[str, int]:
+        return {
+            "code_bytes": int(self.codes.nbytes),
+            "full_vector_bytes": int(self.vectors.nbytes),
+            "resident_bytes": int(
+                self._code_norms.nbytes + self.scales.nbytes + self.mean.nbytes + self.projection.nbytes
+            ),
+        }
+
+
+def _latency_summary(seconds: list[float]) -> dict[str, float]:
+    milliseconds = np.asarray(seconds) * 1000
+    return {
+        "mean": round(float(milliseconds.mean()), 4),
+        "p50": round(float(np.percentile(milliseconds, 50)), 4),
+        "p95": round(float(np.percentile(milliseconds, 95)), 4),
+    }
+
+
+def compare_with_flat(
+    vectors: np.ndarray,
+    compact_index: CompactVectorIndex,
+    k: int = 4,
+    query_count: int = 200,
+    noise: float = 0.05,
+    seed: int = 7,
+    queries: np.ndarray | list[list[float]] | None = None,
+) -> dict[str, Any]:
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if queries is not None and len(queries) > 0:
+        query_source = "embedded_questions"
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+    else:
+        # Perturbed corpus vectors stand in for questions. The noise is scaled
+        # by 1/sqrt(d) so its norm is about `noise` whatever the dimensionality;
+        # unscaled per-dimension noise would swamp a unit-length embedding.
+        query_source = "perturbed_corpus_vectors"
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, len(vectors), size=min(query_count, max(1, len(vectors) * 4)))
+        scale = noise / np.sqrt(vectors.shape[1])
+        queries = vectors[picks] + rng.normal(0, scale, size=(len(picks), vectors.shape[1])).astype(np.float32)
+
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+
+    # Both indexes are timed the same way: one query per call, as requests
+    # arrive in the app.
+    flat_seconds: list[float] = []
+    compact_seconds: list[float] = []
+    matched = 0
+    for query in queries:
+        started = time.perf_counter()
+        _, expected = flat.search(query[None, :], k)
+        flat_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        found, _ = compact_index.search_positions(query, k)
+        compact_seconds.append(time.perf_counter() - started)
+        matched += len(set(found.tolist()) & set(expected[0].tolist()))
+
+    return {
+        "vectors": int(len(vectors)),
+        "dimensions": int(vectors.shape[1]),
+        "compact_dimensions": int(compact_index.codes.shape[1]),
+        "code_dtype": str(compact_index.codes.dtype),
+        "k": k,
+        "query_source": query_source,
+        "queries": int(len(queries)),
+        "recall_at_k": round(matched / (len(queries) * min(k, len(vectors))), 4),
+        "flat_ms_per_query": _latency_summary(flat_seconds),
+        "compact_ms_per_query": _latency_summary(compact_seconds),
+        "flat_index_bytes": int(vectors.nbytes),
+        **compact_index.memory_footprint(),
+    }
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from lexical_index import tokenize
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover - optional dependency at runtime
+    tiktoken = None
+
+
+logger = logging.getLogger("portfolio-assistant.context-packing")
+
+FALLBACK_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])|\n+")
+
+
+class TokenCounter:
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        # tiktoken downloads its BPE file on first use unless TIKTOKEN_CACHE_DIR
+        # points at a bundled copy, so a failed load degrades to an estimate
+        # once instead of retrying on every request.
+        with self._lock:
+            if self._loaded:
+                return
+            if tiktoken is not None:
+                try:
+                    try:
+                        self._encoding = tiktoken.encoding_for_model(self.model)
+                    except KeyError:
+                        self._encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+                except Exception as exc:
+                    logger.warning("Tokenizer unavailable, estimating tokens from characters: %s", exc)
+            self._loaded = True
+
+    @property
+    def exact(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if not self._loaded:
+            self._load()
+        if self._encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    uncompressed_tokens: int
+    documents_used: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.uncompressed_tokens - self.tokens)
+
+
+def source_order_key(document: Document) -> tuple[str, str, str]:
+    return (
+        str(document.metadata.get("source_type", "")),
+        str(document.metadata.get("source_id", "")),
+        document.page_content,
+    )
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+class ContextPacker:
+    def __init__(
+        self,
+        counter: TokenCounter,
+        max_tokens: int,
+        sentences_per_chunk: int = 4,
+        compress: bool = True,
+    ) -> None:
+        self.counter = counter
+        self.max_tokens = max(1, max_tokens)
+        self.sentences_per_chunk = max(1, sentences_per_chunk)
+        self.compress = compress
+
+    def _header(self, index: int, document: Document) -> str:
+        title = document.metadata.get("title") or document.metadata.get("source_id") or f"Source {index}"
+        location = document.metadata.get("url") or document.metadata.get("source_id") or "unknown"
+        return f"[Source {index}] {title}\nLocation: {location}"
+
+    def _extract(self, query_terms: set[str], document: Document, weights: dict[str, float]) -> str:
+        # A portfolio record is one XML element rendered with all of its child
+        # fields; dropping lines from it loses list items and stacks wholesale.
+        if document.metadata.get("section_path"):
+            return document.page_content.strip()
+
+        sentences = split_sentences(document.page_content)
+        if len(sentences) <= self.sentences_per_chunk:
+            return "\n".join(sentences)
+
+        scores = {
+            position: sum(weights.get(term, 0.0) for term in set(tokenize(sentence)) & query_terms)
+            for position, sentence in enumerate(sentences)
+        }
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        matched = [position for position in ranked[: self.sentences_per_chunk] if scores[position] > 0]
+        if not matched or scores[0] > 0:
+            # Nothing shares a term with the question (the chunk was retrieved
+            # for its meaning), or the opening line does and the chunk is about
+            # what was asked; either way there is nothing safe to cut.
+            return document.page_content.strip()
+
+        # Page text is split into short lines, and the answer is often the
+        # line next to the match ("Contact:" then the address), so neighbours
+        # come along.
+        chosen: set[int] = set()
+        for position in matched:
+            chosen.update(range(max(0, position - 1), min(len(sentences), position + 2)))
+        # Slots the matching sentences leave free go to the remaining ones in
+        # document order, so a chunk always keeps sentences_per_chunk lines.
+        for position in range(len(sentences)):
+            if len(chosen) >= self.sentences_per_chunk:
+                break
+            chosen.add(position)
+        return "\n".join(sentences[position] for position in sorted(chosen))
+
+    def _term_weights(self, query_terms: set[str], documents: list[Document]) -> dict[str, float]:
+        document_frequency: Counter[str] = Counter()
+        for document in documents:
+            document_frequency.update(set(tokenize(document.page_content)) & query_terms)
+        total = len(documents)
+        return {term: math.log(1 + total / count) for term, count in document_frequency.items()}
+
+    def pack(self, query: str, documents: list[Document], deterministic: bool = False) -> PackedContext:
+        full_tokens = [
+            self.counter.count(f"{self._header(index, document)}\n{document.page_content.strip()}".strip())
+            for index, document in enumerate(documents, start=1)
+        ]
+        query_terms = set(tokenize(query))
+        weights = self._term_weights(query_terms, documents) if self.compress else {}
+
+        selected: list[tuple[Document, str]] = []
+        tokens = 0
+        uncompressed_tokens = 0
+        for index, document in enumerate(documents, start=1):
+            header = self._header(index, document)
+            body = document.page_content.strip()
+            block_tokens = full_tokens[index - 1]
+            if self.compress:
+                # Applied whenever it is shorter, not only over budget: a
+                # website chunk is mostly sentences the question never asks
+                # about, and every one of them is paid for on each request.
+                extracted = self._extract(query_terms, document, weights)
+                extracted_tokens = self.counter.count(f"{header}\n{extracted}".strip())
+                if extracted_tokens < block_tokens:
+                    body, block_tokens = extracted, extracted_tokens
+
+            if selected and tokens + block_tokens > self.max_tokens:
+                break
+
+            selected.append((document, body))
+            tokens += block_tokens
+            uncompressed_tokens += full_tokens[index - 1]
+
+        if deterministic:
+            # Rank order changes with every question; source order does not,
+            # so the same set of chunks always renders to the same text.
+            selected.sort(key=lambda item: source_order_key(item[0]))
+
+        blocks = [
+            f"{self._header(index, document)}\n{body}".strip()
+            for index, (document, body) in enumerate(selected, start=1)
+        ]
+        return PackedContext(
+            text="\n\n".join(blocks).strip(),
+            tokens=tokens,
+            uncompressed_tokens=uncompressed_tokens,
+            documents_used=len(blocks),
+        )
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import gzip
+import heapq
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+
+logger = logging.getLogger("portfolio-assistant.crawl-frontier")
+
+ROBOTS_USER_AGENT = "PortfolioAssistantBot"
+DEFAULT_SITEMAP_PRIORITY = 0.5
+DEPTH_PENALTY = 0.1
+MAX_SITEMAP_FILES = 10
+
+
+@dataclass(frozen=True)
+class SitemapEntry:
+    url: str
+    lastmod: float | None = None
+    priority: float = DEFAULT_SITEMAP_PRIORITY
+
+
+@dataclass(frozen=True)
+class FrontierEntry:
+    url: str
+    depth: int
+    priority: float
+    lastmod: float | None = None
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_lastmod(value: str | None) -> float | None:
+    if not value:
+        return None
+    text = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_priority(value: str | None) -> float:
+    try:
+        return min(1.0, max(0.0, float(value))) if value else DEFAULT_SITEMAP_PRIORITY
+    except ValueError:
+        return DEFAULT_SITEMAP_PRIORITY
+
+
+def load_robots(session: requests.Session, base_url: str, timeout_seconds: float) -> RobotFileParser | None:
+    robots_url = urljoin(base_url, "/robots.txt")
+    try:
+        response = session.get(robots_url, timeout=timeout_seconds)
+    except requests.RequestException as exc:
+        logger.info("robots.txt unavailable at %s: %s", robots_url, exc)
+        return None
+    if response.status_code >= 400:
+        return None
+
+    robots = RobotFileParser(robots_url)
+    robots.parse(response.text.splitlines())
+    return robots
+
+
+def load_sitemap_entries(
+    session: requests.Session,
+    sitemap_urls: list[str],
+    timeout_seconds: float,
+) -> list[SitemapEntry]:
+    entries: list[SitemapEntry] = []
+    pending = list(dict.fromkeys(sitemap_urls))
+    fetched: set[str] = set()
+
+    while pending and len(fetched) < MAX_SITEMAP_FILES:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in fetched:
+            continue
+        fetched.add(sitemap_url)
+        try:
+            response = session.get(sitemap_url, timeout=timeout_seconds)
+            response.raise_for_status()
+            content = response.content
+            if content[:2] == b"\x1f\x8b":
+                content = gzip.decompress(content)
+            root = ET.fromstring(content)
+        except (requests.RequestException, ET.ParseError, OSError) as exc:
+            logger.info("Sitemap unavailable at %s: %s", sitemap_url, exc)
+            continue
+
+        for node in root:
+            fields = {_local_name(child.tag): (child.text or "").strip() for child in node}
+            location = fields.get("loc")
+            if not location:
+                continue
+            if _local_name(root.tag) == "sitemapindex":
+                pending.append(location)
+            else:
+                entries.append(
+                    SitemapEntry(
+                        url=location,
+                        lastmod=_parse_lastmod(fields.get("lastmod")),
+                        priority=_parse_priority(fields.get("priority")),
+                    )
+                )
+
+    logger.info("Sitemaps listed %s URL(s).", len(entries))
+    return entries
+
+
+class CrawlFrontier:
+    def __init__(
+        self,
+        normalize: Callable[[str], str],
+        accept: Callable[[str], bool],
+        robots: RobotFileParser | None = None,
+    ) -> None:
+        self._normalize = normalize
+        self._accept = accept
+        self._robots = robots
+        self._heap: list[tuple[float, int, FrontierEntry]] = []
+        self._seen: set[str] = set()
+        self._sequence = 0
+        self.blocked_by_robots = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(
+        self,
+        url: str,
+        depth: int,
+        priority: float = DEFAULT_SITEMAP_PRIORITY,
+        lastmod: float | None = None,
+    ) -> bool:
+        url = self._normalize(url)
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        if not self._accept(url):
+            return False
+        if self._robots is not None and not self._robots.can_fetch(ROBOTS_USER_AGENT, url):
+            self.blocked_by_robots += 1
+            return False
+
+        # Higher sitemap priority and shallower pages come out first; ties
+        # keep discovery order.
+        score = priority - DEPTH_PENALTY * depth
+        heapq.heappush(self._heap, (-score, self._sequence, FrontierEntry(url, depth, priority, lastmod)))
+        self._sequence += 1
+        return True
+
+    def pop(self) -> FrontierEntry | None:
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[2]
+
+    def seed(
+        self,
+        session: requests.Session,
+        base_url: str,
+        timeout_seconds: float,
+        use_sitemap: bool = True,
+    ) -> None:
+        self.add(base_url, depth=0, priority=1.0)
+        if not use_sitemap:
+            return
+
+        sitemap_urls = list(self._robots.site_maps() or []) if self._robots is not None else []
+        if not sitemap_urls:
+            sitemap_urls = [urljoin(base_url, "/sitemap.xml")]
+        for entry in load_sitemap_entries(session, sitemap_urls, timeout_seconds):
+            path_depth = len([part for part in urlparse(entry.url).path.split("/") if part])
+            self.add(entry.url, depth=max(1, path_depth), priority=entry.priority, lastmod=entry.lastmod)
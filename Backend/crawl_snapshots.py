@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, fields
+
+from web_loader import WebsitePage
+
+
+logger = logging.getLogger("portfolio-assistant.crawl-snapshots")
+
+SNAPSHOT_FORMAT_VERSION = 1
+PAGE_FIELDS = {page_field.name for page_field in fields(WebsitePage)}
+
+
+def site_key(base_url: str) -> str:
+    return hashlib.sha256(base_url.strip().rstrip("/").encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint_pages(pages: list[WebsitePage]) -> str:
+    # Fetch times change on every revalidation; the content they describe
+    # does not, so they stay out of the hash.
+    digest = hashlib.sha256()
+    for page in pages:
+        payload = json.dumps(
+            {key: value for key, value in asdict(page).items() if key != "fetched_at"},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        digest.update(payload.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class CrawlSnapshot:
+    base_url: str
+    content_hash: str
+    saved_at: float
+    pages: list[WebsitePage]
+
+
+class CrawlSnapshotStore:
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+
+    def snapshot_path(self, base_url: str, content_hash: str) -> str:
+        return os.path.join(self.root_dir, f"crawl-{site_key(base_url)}-{content_hash}.json.gz")
+
+    def _site_snapshots(self, base_url: str) -> list[str]:
+        pattern = os.path.join(self.root_dir, f"crawl-{site_key(base_url)}-*.json.gz")
+        return sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+
+    def load(self, base_url: str) -> CrawlSnapshot | None:
+        for path in self._site_snapshots(base_url):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as handle:
+                    payload = json.load(handle)
+                if payload.get("format") != SNAPSHOT_FORMAT_VERSION or payload.get("base_url") != base_url:
+                    continue
+                pages = [
+                    WebsitePage(**{key: value for key, value in page.items() if key in PAGE_FIELDS})
+                    for page in payload.get("pages", [])
+                ]
+            except (OSError, ValueError, TypeError) as exc:
+                logger.warning("Ignoring unreadable crawl snapshot at %s: %s", path, exc)
+                continue
+
+            logger.info("Loaded crawl snapshot %s with %s page(s).", os.path.basename(path), len(pages))
+            return CrawlSnapshot(
+                base_url=base_url,
+                content_hash=payload.get("content_hash", ""),
+                saved_at=float(payload.get("saved_at", 0.0)),
+                pages=pages,
+            )
+        return None
+
+    def save(self, base_url: str, pages: list[WebsitePage]) -> str:
+        os.makedirs(self.root_dir, exist_ok=True)
+        content_hash = fingerprint_pages(pages)
+        final_path = self.snapshot_path(base_url, content_hash)
+
+        if os.path.exists(final_path):
+            os.utime(final_path)
+            return final_path
+
+        payload = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "base_url": base_url,
+            "content_hash": content_hash,
+            "saved_at": time.time(),
+            "pages": [asdict(page) for page in pages],
+        }
+        descriptor, staging_path = tempfile.mkstemp(prefix=".crawl-", suffix=".json.gz", dir=self.root_dir)
+        try:
+            with os.fdopen(descriptor, "wb") as raw_handle:
+                with gzip.GzipFile(fileobj=raw_handle, mode="wb") as handle:
+                    handle.write(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            os.replace(staging_path, final_path)
+        except Exception:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            raise
+
+        for path in self._site_snapshots(base_url):
+            if path != final_path:
+                os.remove(path)
+        logger.info("Saved crawl snapshot %s with %s page(s).", os.path.basename(final_path), len(pages))
+        return final_path
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from langchain_core.embeddings import Embeddings
+
+
+logger = logging.getLogger("portfolio-assistant.embedding-pipeline")
+
+BatchCallback = Callable[[list[int], list[list[float]]], None]
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    return status_code == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    raw_value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(raw_value) if raw_value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        batch_size: int = 64,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+
+    def _embed_batch(self, embeddings: Embeddings, texts: list[str]) -> list[list[float]]:
+        attempt = 0
+        while True:
+            try:
+                return embeddings.embed_documents(texts)
+            except Exception as exc:
+                if not _is_rate_limited(exc) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after_seconds(exc)
+                if delay is None:
+                    delay = self.backoff_seconds * (2**attempt) * (1 + random.random())
+                attempt += 1
+                logger.warning(
+                    "Embeddings rate limited. Retrying batch of %s in %.1fs (attempt %s/%s).",
+                    len(texts),
+                    delay,
+                    attempt,
+                    self.max_retries,
+                )
+                time.sleep(delay)
+
+    def embed(
+        self,
+        embeddings: Embeddings,
+        texts: list[str],
+        on_batch: BatchCallback | None = None,
+    ) -> list[list[float]]:
+        if not texts:
+            return []
+
+        batches = [
+            list(range(start, min(start + self.batch_size, len(texts))))
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        vectors: list[Any] = [None] * len(texts)
+        callback_lock = threading.Lock()
+
+        def run(indices: list[int]) -> None:
+            batch_vectors = self._embed_batch(embeddings, [texts[index] for index in indices])
+            for index, vector in zip(indices, batch_vectors):
+                vectors[index] = vector
+            if on_batch is not None:
+                with callback_lock:
+                    on_batch(indices, batch_vectors)
+
+        if len(batches) == 1:
+            run(batches[0])
+            return vectors
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.concurrency, len(batches)),
+            thread_name_prefix="embedding",
+        ) as executor:
+            for future in [executor.submit(run, indices) for indices in batches]:
+                future.result()
+        return vectors
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except Exception:  # pragma: no cover - optional dependency at runtime
+    lxml = None
+    etree = None
+
+
+logger = logging.getLogger("portfolio-assistant.html-extractors")
+
+SKIPPED_TAGS = ("script", "style", "noscript", "header", "footer", "nav")
+
+
+@dataclass
+class ExtractedHtml:
+    title: str
+    strings: list[str]
+    hrefs: list[str]
+
+
+class HtmlExtractor:
+    name = "base"
+
+    def extract(self, html: str) -> ExtractedHtml:
+        raise NotImplementedError
+
+
+class BeautifulSoupExtractor(HtmlExtractor):
+    name = "html.parser"
+
+    def extract(self, html: str) -> ExtractedHtml:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(list(SKIPPED_TAGS)):
+            tag.decompose()
+
+        return ExtractedHtml(
+            title=soup.title.get_text(" ", strip=True) if soup.title else "",
+            strings=soup.get_text(separator="\n").splitlines(),
+            hrefs=[link["href"] for link in soup.find_all("a", href=True)],
+        )
+
+
+class LxmlExtractor(HtmlExtractor):
+    name = "lxml"
+
+    def _parse(self, html: str) -> Any | None:
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode input that still carries an XML encoding declaration.
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+        except etree.ParserError:
+            return None
+
+    def extract(self, html: str) -> ExtractedHtml:
+        root = self._parse(html) if html.strip() else None
+        if root is None:
+            return ExtractedHtml(title="", strings=[], hrefs=[])
+
+        # Walks the tree once with an explicit stack instead of dropping nodes:
+        # skipped elements lose their content but keep their tail text as a
+        # separate string, which is what BeautifulSoup's decompose() does.
+        strings: list[str] = []
+        hrefs: list[str] = []
+        title = None
+        stack: list[tuple[Any, bool]] = [(root, False)]
+        while stack:
+            element, emit_tail = stack.pop()
+            if emit_tail:
+                if element.tail:
+                    strings.append(element.tail)
+                continue
+
+            tag = element.tag if isinstance(element.tag, str) else None
+            stack.append((element, True))
+            if tag is None or tag in SKIPPED_TAGS:
+                continue
+            if tag == "title" and title is None:
+                title = element
+            if tag == "a" and element.get("href") is not None:
+                hrefs.append(element.get("href"))
+            if element.text:
+                strings.append(element.text)
+            stack.extend((child, False) for child in reversed(element))
+
+        title_text = " ".join(part.strip() for part in title.itertext() if part.strip()) if title is not None else ""
+        lines = [line for value in strings for line in value.splitlines()]
+        return ExtractedHtml(title=title_text, strings=lines, hrefs=hrefs)
+
+
+def get_extractor(name: str = "auto") -> HtmlExtractor:
+    if name in {"auto", "lxml"} and lxml is not None:
+        return LxmlExtractor()
+    if name == "lxml":
+        logger.warning("lxml is not installed. Falling back to the html.parser extractor.")
+    return BeautifulSoupExtractor()
+
+
+def _clean_lines(strings: list[str]) -> list[str]:
+    return [line for line in (" ".join(value.split()) for value in strings) if line]
+
+
+def benchmark_extractors(fixtures_dir: str, repeat: int = 20) -> dict[str, Any]:
+    paths = sorted(glob.glob(os.path.join(fixtures_dir, "*.html")))
+    if not paths:
+        raise FileNotFoundError(f"No .html fixtures found in {fixtures_dir}")
+    documents = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as handle:
+            documents.append(handle.read())
+
+    extractors = [BeautifulSoupExtractor()]
+    if lxml is not None:
+        extractors.append(LxmlExtractor())
+
+    outputs: dict[str, list[ExtractedHtml]] = {}
+    report: dict[str, Any] = {
+        "fixtures": len(paths),
+        "bytes": sum(len(document.encode("utf-8")) for document in documents),
+        "repeat": repeat,
+        "extractors": {},
+    }
+    for extractor in extractors:
+        started = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            results = [extractor.extract(document) for document in documents]
+        elapsed = time.perf_counter() - started
+        outputs[extractor.name] = results
+        report["extractors"][extractor.name] = {
+            "pages_per_second": round(len(documents) * max(1, repeat) / elapsed, 1),
+            "ms_per_page": round(elapsed * 1000 / (len(documents) * max(1, repeat)), 3),
+        }
+
+    baseline = outputs[BeautifulSoupExtractor.name]
+    for name, results in outputs.items():
+        mismatches = [
+            os.path.basename(path)
+            for path, expected, actual in zip(paths, baseline, results)
+            if (
+                " ".join(expected.title.split()) != " ".join(actual.title.split())
+                or _clean_lines(expected.strings) != _clean_lines(actual.strings)
+                or expected.hrefs != actual.hrefs
+            )
+        ]
+        report["extractors"][name]["parity_mismatches"] = mismatches
+    return report
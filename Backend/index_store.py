@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from compact_index import CompactVectorIndex
+
+
+logger = logging.getLogger("portfolio-assistant.index-store")
+
+MANIFEST_FILENAME = "manifest.json"
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def fingerprint_documents(documents: list[Document]) -> str:
+    digest = hashlib.sha256()
+    for document in documents:
+        payload = json.dumps(
+            {"content": document.page_content, "metadata": document.metadata},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        digest.update(payload.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def artifact_key(
+    content_hash: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    embedding_model: str,
+    index_options: dict[str, Any] | None = None,
+) -> str:
+    payload = json.dumps(
+        {
+            "format": ARTIFACT_FORMAT_VERSION,
+            "content_hash": content_hash,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "embedding_model": embedding_model,
+            "index_options": index_options or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class IndexArtifactStore:
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+
+    def artifact_path(self, source_name: str, key: str) -> str:
+        return os.path.join(self.root_dir, f"{source_name}-{key}")
+
+    def load(
+        self,
+        source_name: str,
+        key: str,
+        embeddings: Embeddings,
+    ) -> tuple[FAISS | CompactVectorIndex, dict[str, Any]] | None:
+        path = self.artifact_path(source_name, key)
+        manifest_path = os.path.join(path, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as handle:
+                manifest = json.load(handle)
+            if manifest.get("index_mode") == "compact":
+                vectorstore = CompactVectorIndex.load_local(path)
+            else:
+                # The docstore is pickled by FAISS.save_local. Only artifacts written by
+                # this service under its own cache directory are ever loaded here.
+                vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        except Exception as exc:
+            logger.warning("Ignoring unreadable index artifact at %s: %s", path, exc)
+            return None
+
+        logger.info("Loaded %s index artifact %s", source_name, key)
+        return vectorstore, manifest
+
+    def save(
+        self,
+        source_name: str,
+        key: str,
+        vectorstore: FAISS | CompactVectorIndex,
+        manifest: dict[str, Any],
+    ) -> str:
+        os.makedirs(self.root_dir, exist_ok=True)
+        final_path = self.artifact_path(source_name, key)
+        staging_path = tempfile.mkdtemp(prefix=f".{source_name}-", dir=self.root_dir)
+
+        try:
+            vectorstore.save_local(staging_path)
+            with open(os.path.join(staging_path, MANIFEST_FILENAME), "w", encoding="utf-8") as handle:
+                json.dump({**manifest, "key": key, "built_at": time.time()}, handle, indent=2)
+
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path, ignore_errors=True)
+            os.replace(staging_path, final_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+        self._remove_stale_artifacts(source_name, keep=final_path)
+        logger.info("Saved %s index artifact %s", source_name, key)
+        return final_path
+
+    def _remove_stale_artifacts(self, source_name: str, keep: str) -> None:
+        prefix = f"{source_name}-"
+        for entry in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, entry)
+            if entry.startswith(prefix) and path != keep and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+from langchain_core.documents import Document
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    {
+        "a", "about", "an", "and", "any", "are", "as", "at", "be", "by", "can", "did", "do",
+        "does", "for", "from", "had", "has", "have", "he", "her", "him", "his", "how", "i",
+        "in", "is", "it", "its", "me", "my", "of", "on", "or", "she", "so", "tell", "that",
+        "the", "their", "them", "there", "they", "this", "to", "was", "what", "when", "where",
+        "which", "who", "why", "with", "you", "your",
+    }
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, documents: list[Document], k1: float = 1.5, b: float = 0.75) -> None:
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+
+        for position, document in enumerate(documents):
+            counts = Counter(tokenize(document.page_content))
+            self._lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self._postings.setdefault(term, []).append((position, frequency))
+
+        total_documents = len(documents)
+        self._average_length = (sum(self._lengths) / total_documents) if total_documents else 0.0
+        self._idf = {
+            term: math.log(1 + (total_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int) -> list[Document]:
+        return [document for document, _ in self.search_with_scores(query, k)]
+
+    def search_with_scores(self, query: str, k: int) -> list[tuple[Document, float]]:
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for position, frequency in postings:
+                length_ratio = self._lengths[position] / self._average_length if self._average_length else 1.0
+                denominator = frequency + self.k1 * (1 - self.b + self.b * length_ratio)
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / denominator
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[position], score) for position, score in ranked]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from typing import Hashable
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+HASH_MASK = (1 << 32) - 1
+# A block counts as boilerplate only once it shows up on this share of the
+# crawled pages, and never on fewer than REPEATED_BLOCK_MIN_PAGES of them.
+REPEATED_BLOCK_PAGE_FRACTION = 0.5
+REPEATED_BLOCK_MIN_PAGES = 3
+
+
+def _words(text: str) -> list[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set[str]:
+    words = _words(text)
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index : index + size]) for index in range(len(words) - size + 1)}
+
+
+def jaccard(left: set[str], right: set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class MinHasher:
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, seed: int = 17) -> None:
+        rng = np.random.default_rng(seed)
+        self.permutations = permutations
+        self._a = rng.integers(1, HASH_MASK, size=permutations, dtype=np.uint64)
+        self._b = rng.integers(0, HASH_MASK, size=permutations, dtype=np.uint64)
+
+    def signature(self, shingle_set: set[str]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.permutations, HASH_MASK, dtype=np.uint64)
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+                for value in shingle_set
+            ),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        # a, b and the hashes are all below 2**32, so a * h + b fits in uint64.
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0) & np.uint64(HASH_MASK)
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        permutations: int = MINHASH_PERMUTATIONS,
+        bands: int = LSH_BANDS,
+    ) -> None:
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.hasher = MinHasher(permutations)
+        self._buckets: dict[tuple[int, bytes], list[int]] = {}
+        self._signatures: list[np.ndarray] = []
+        self._exact: set[str] = set()
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def cluster(self, text: str) -> Hashable | None:
+        # Returns the same key for every near-copy of a block that was seen
+        # before, and a new key otherwise.
+        words = _words(text)
+        if not words:
+            return None
+
+        # Short blocks ("Contact", "Hire me") have too few shingles for MinHash
+        # to mean anything, so they only ever match exactly.
+        if len(words) < SHINGLE_WORDS * 2:
+            return " ".join(words)
+
+        signature = self.hasher.signature(shingles(text))
+        band_keys = self._band_keys(signature)
+        candidates = {position for key in band_keys for position in self._buckets.get(key, [])}
+        for position in sorted(candidates):
+            if float(np.mean(self._signatures[position] == signature)) >= self.threshold:
+                return position
+
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(position)
+        return position
+
+
+def remove_repeated_blocks(
+    texts: list[str],
+    threshold: float = 0.8,
+    page_fraction: float = REPEATED_BLOCK_PAGE_FRACTION,
+    min_pages: int = REPEATED_BLOCK_MIN_PAGES,
+) -> tuple[list[str], int]:
+    # Shared hero text, contact blocks and CTAs repeat on most pages; a tech
+    # tag or date that two project pages happen to share does not. Only blocks
+    # found on enough pages are dropped, and the first page that has one keeps
+    # it, so it is still indexed once.
+    index = NearDuplicateIndex(threshold)
+    pages: list[list[tuple[str, Hashable | None]]] = []
+    pages_with_block: dict[Hashable, set[int]] = {}
+    for page_number, text in enumerate(texts):
+        blocks = [(block, index.cluster(block)) for block in text.splitlines() if block.strip()]
+        for _, key in blocks:
+            if key is not None:
+                pages_with_block.setdefault(key, set()).add(page_number)
+        pages.append(blocks)
+
+    required_pages = max(min_pages, math.ceil(page_fraction * len(texts)))
+    cleaned: list[str] = []
+    removed = 0
+    for page_number, blocks in enumerate(pages):
+        kept: list[str] = []
+        for block, key in blocks:
+            found_on = pages_with_block.get(key, set())
+            # Repeats inside one page are left alone; only later pages lose
+            # a block that counts as boilerplate.
+            if len(found_on) >= required_pages and page_number != min(found_on):
+                removed += 1
+                continue
+            kept.append(block)
+        cleaned.append("\n".join(kept))
+    return cleaned, removed
+
+
+def collapse_near_duplicates(documents: list[Document], threshold: float = 0.8) -> list[Document]:
+    kept: list[Document] = []
+    kept_shingles: list[set[str]] = []
+    for document in documents:
+        document_shingles = shingles(document.page_content)
+        if any(jaccard(document_shingles, existing) >= threshold for existing in kept_shingles):
+            continue
+        kept.append(document)
+        kept_shingles.append(document_shingles)
+    return kept
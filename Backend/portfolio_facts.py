@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+
+CONTACT_FIELDS = ("email", "phone", "linkedin", "github")
+MAX_FAST_PATH_WORDS = 14
+OPEN_ENDED_PATTERN = re.compile(
+    r"\b(why|compare|versus|vs|explain|describe|write|draft|compose|summari[sz]e|opinion|"
+    r"better|best|should|would|could|how many|how long|years|project|projects|hire|rate|salary)\b"
+)
+# "Does he know X?" and "Has he used X?" want a yes or no about one thing,
+# not the whole list.
+YES_NO_PATTERN = re.compile(
+    r"^(do|does|did|is|was|has|have|had|can|will|are)\b|"
+    r"\b(know|knows|familiar|proficient|experienced|any experience)\b"
+)
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+# Words a bare list question ("What are his skills?", "Where does he work
+# now?") is made of. Anything else is content the lookup cannot answer.
+LIST_QUESTION_WORDS = frozenset(
+    """
+    a about all an and any are at can core current did do does for give has have he her his i in is it its
+    key list main me now of on please primary role show she skill skills skillset stack tech technical
+    technologies technology tell the their them they this tool tools top use used uses what whats which
+    with you your company employer experience job position where work working works
+    """.split()
+)
+# The same for contact lookups ("How can I get in touch with him?").
+CONTACT_QUESTION_WORDS = LIST_QUESTION_WORDS | frozenset(
+    """
+    account address call cell connect contact details e email find get git github handle him how hub id
+    info information link linked linkedin mail may message mobile number out phone profile reach send share
+    to touch url via way whatsapp could we
+    """.split()
+)
+# "Can I get his email?" and "Do you have his number?" are requests, not
+# yes/no questions.
+POLITE_REQUEST_PATTERN = re.compile(r"^(can|could|may) (i|we|you)\b|^(do|does) (you|anyone) have\b")
+
+
+@dataclass(frozen=True)
+class FactIntent:
+    name: str
+    pattern: re.Pattern[str]
+    fields: tuple[str, ...]
+    list_question: bool = False
+
+
+INTENTS = (
+    FactIntent("email", re.compile(r"\b(e-?mail|mail id|mail address)\b"), ("email",)),
+    FactIntent("phone", re.compile(r"\b(phone|mobile|cell|whatsapp|contact number)\b"), ("phone",)),
+    FactIntent("linkedin", re.compile(r"\blinked ?in\b"), ("linkedin",)),
+    FactIntent("github", re.compile(r"\bgit ?hub\b"), ("github",)),
+    FactIntent(
+        "contact",
+        re.compile(r"\b(contact|reach (him|out|manuj)|get in touch|connect with)\b"),
+        CONTACT_FIELDS,
+    ),
+    FactIntent(
+        "skills",
+        re.compile(r"\b(skills?|skill ?set|tech(nology)? stack|technologies|tools)\b"),
+        ("skills",),
+        list_question=True,
+    ),
+    FactIntent(
+        "location",
+        re.compile(r"\b(where is (he|manuj) (based|located|from)|where does (he|manuj) live|location|based in)\b"),
+        ("location",),
+    ),
+    FactIntent(
+        "experience",
+        re.compile(r"\b(where does (he|manuj) work|current (role|job|company|position)|work experience|employer)\b"),
+        ("experience",),
+        list_question=True,
+    ),
+)
+FIELD_LABELS = {
+    "email": "Email",
+    "phone": "Phone",
+    "linkedin": "LinkedIn",
+    "github": "GitHub",
+    "location": "Location",
+}
+FIELD_NOUNS = {
+    "email": "email address",
+    "phone": "phone number",
+    "linkedin": "LinkedIn profile",
+    "github": "GitHub profile",
+}
+
+
+@dataclass
+class FastAnswer:
+    intent: str
+    text: str
+    sections: dict[str, str] = field(default_factory=dict)
+
+
+def _element_text(element: ET.Element | None) -> str:
+    if element is None or element.text is None:
+        return ""
+    return " ".join(element.text.split())
+
+
+class PortfolioFactIndex:
+    def __init__(
+        self,
+        name: str,
+        personal: dict[str, str],
+        skills: list[tuple[str, str]],
+        jobs: list[dict[str, str]],
+    ) -> None:
+        self.name = name
+        self.personal = personal
+        self.skills = skills
+        self.jobs = jobs
+        self.skill_terms = {
+            term.strip().lower()
+            for _, values in skills
+            for term in values.split(",")
+            if term.strip()
+        }
+
+    @classmethod
+    def from_tree(cls, root: ET.Element) -> PortfolioFactIndex:
+        personal_node = root.find("personal")
+        personal = {
+            child.tag: _element_text(child)
+            for child in (personal_node if personal_node is not None else [])
+            if _element_text(child)
+        }
+        skills_node = root.find("skills")
+        skills = [
+            (child.tag.replace("_", " "), _element_text(child))
+            for child in (skills_node if skills_node is not None else [])
+            if _element_text(child)
+        ]
+        jobs = [
+            {child.tag: _element_text(child) for child in job if _element_text(child)}
+            for job in root.findall("experience/job")
+        ]
+        return cls(personal.get("name", ""), personal, skills, jobs)
+
+    @property
+    def first_name(self) -> str:
+        return self.name.split()[0] if self.name else "The portfolio owner"
+
+    def match_intent(self, prompt: str) -> FactIntent | None:
+        lowered = " ".join(prompt.lower().split())
+        if len(lowered.split()) > MAX_FAST_PATH_WORDS or OPEN_ENDED_PATTERN.search(lowered):
+            return None
+
+        matches = [intent for intent in INTENTS if intent.pattern.search(lowered)]
+        if not matches:
+            return None
+        if len(matches) == 1:
+            intent = matches[0]
+        elif all(set(intent.fields) <= set(CONTACT_FIELDS) for intent in matches):
+            intent = next(intent for intent in INTENTS if intent.name == "contact")
+        else:
+            return None
+
+        if intent.list_question:
+            return intent if self._is_bare_list_question(lowered) else None
+        if set(intent.fields) <= set(CONTACT_FIELDS):
+            return intent if self._is_bare_contact_question(lowered) else None
+        return intent
+
+    def _question_words(self, lowered: str) -> set[str]:
+        name_words = set(self.name.lower().split())
+        words = {word.rstrip(".") for word in WORD_PATTERN.findall(lowered.replace("'s", "").replace("'", ""))}
+        return words - name_words
+
+    def _is_bare_list_question(self, lowered: str) -> bool:
+        if YES_NO_PATTERN.search(lowered):
+            return False
+        if any(re.search(rf"(?<![\w.+#]){re.escape(term)}(?![\w+#])", lowered) for term in self.skill_terms):
+            return False
+        return not (self._question_words(lowered) - LIST_QUESTION_WORDS)
+
+    def _is_bare_contact_question(self, lowered: str) -> bool:
+        # "Is his email verified?" asks about the address, not for it.
+        if YES_NO_PATTERN.search(lowered) and not POLITE_REQUEST_PATTERN.search(lowered):
+            return False
+        return not (self._question_words(lowered) - CONTACT_QUESTION_WORDS)
+
+    def answer(self, prompt: str) -> FastAnswer | None:
+        intent = self.match_intent(prompt)
+        if intent is None:
+            return None
+        if intent.name == "skills":
+            return self._skills_answer()
+        if intent.name == "experience":
+            return self._experience_answer()
+        return self._personal_answer(intent)
+
+    def _personal_answer(self, intent: FactIntent) -> FastAnswer | None:
+        fields = [name for name in intent.fields if self.personal.get(name)]
+        values = [(FIELD_LABELS[name], self.personal[name]) for name in fields]
+        if len(values) != len(intent.fields) and intent.name != "contact":
+            return None
+        if not values:
+            return None
+
+        owner = f"{self.first_name}'s"
+        if intent.name == "location":
+            text = f"{self.first_name} is based in {values[0][1]}."
+        elif len(values) == 1:
+            text = f"{owner} {FIELD_NOUNS[fields[0]]} is {values[0][1]}."
+        else:
+            lines = "\n".join(f"- {label}: {value}" for label, value in values)
+            text = f"You can reach {self.first_name} through:\n{lines}"
+
+        section = "\n".join(f"{label.lower()}: {value}" for label, value in values)
+        return FastAnswer(intent=intent.name, text=text, sections={"personal": section})
+
+    def _skills_answer(self) -> FastAnswer | None:
+        if not self.skills:
+            return None
+        lines = "\n".join(f"- {group.title()}: {values}" for group, values in self.skills)
+        section = "\n".join(f"{group}: {values}" for group, values in self.skills)
+        return FastAnswer(
+            intent="skills",
+            text=f"Here are {self.first_name}'s core skills:\n{lines}",
+            sections={"skills": section},
+        )
+
+    def _experience_answer(self) -> FastAnswer | None:
+        lines = []
+        for job in self.jobs:
+            if not job.get("title") or not job.get("company"):
+                continue
+            duration = f" ({job['duration']})" if job.get("duration") else ""
+            lines.append(f"- {job['title']} at {job['company']}{duration}")
+        if not lines:
+            return None
+        body = "\n".join(lines)
+        return FastAnswer(
+            intent="experience",
+            text=f"{self.first_name}'s experience:\n{body}",
+            sections={"experience": body.replace("- ", "")},
+        )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.documents import Document
+
+from lexical_index import BM25Index
+
+
+RRF_RANK_CONSTANT = 60
+
+
+def document_fingerprint(document: Document) -> tuple[str, str]:
+    return str(document.metadata.get("source_id", "unknown")), document.page_content
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: list[list[Document]],
+    weights: list[float] | None = None,
+    rank_constant: int = RRF_RANK_CONSTANT,
+) -> list[Document]:
+    weights = weights or [1.0] * len(ranked_lists)
+    scores: dict[tuple[str, str], float] = {}
+    documents: dict[tuple[str, str], Document] = {}
+
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, document in enumerate(ranked, start=1):
+            fingerprint = document_fingerprint(document)
+            scores[fingerprint] = scores.get(fingerprint, 0.0) + weight / (rank_constant + rank)
+            documents.setdefault(fingerprint, document)
+
+    ordered = sorted(scores, key=lambda fingerprint: scores[fingerprint], reverse=True)
+    return [documents[fingerprint] for fingerprint in ordered]
+
+
+class MultiSourceRetriever:
+    def __init__(self, max_workers: int = 4) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+
+    def search(
+        self,
+        query: str,
+        query_embedding: list[float] | None,
+        stores: list[Any],
+        lexical_indexes: list[BM25Index],
+        k: int,
+    ) -> list[Document]:
+        if query_embedding is None:
+            stores = []
+
+        futures = [
+            self._executor.submit(store.similarity_search_by_vector, query_embedding, k=k)
+            for store in stores
+        ]
+        ranked_lists = [index.search(query, k) for index in lexical_indexes]
+        ranked_lists.extend(future.result() for future in futures)
+        ranked_lists = [ranked for ranked in ranked_lists if ranked]
+
+        if not ranked_lists:
+            return []
+        if len(ranked_lists) == 1:
+            return ranked_lists[0]
+        return reciprocal_rank_fusion(ranked_lists)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from caching import TTLCache
+from context_packing import TokenCounter, split_sentences
+
+
+SUMMARY_ANSWER_CHARS = 240
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+@dataclass
+class SessionState:
+    summary: list[str] = field(default_factory=list)
+    turns: list[dict[str, str]] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"summary": self.summary, "turns": self.turns, "updated_at": self.updated_at}
+
+    @property
+    def summary_text(self) -> str:
+        return "\n".join(self.summary)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SessionState:
+        return cls(
+            summary=list(data.get("summary", [])),
+            turns=list(data.get("turns", [])),
+            updated_at=float(data.get("updated_at", time.time())),
+        )
+
+
+class SessionBackend:
+    def get(self, session_id: str) -> SessionState | None:
+        raise NotImplementedError
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySessionBackend(SessionBackend):
+    def __init__(self, max_sessions: int, ttl_seconds: float) -> None:
+        self._cache = TTLCache(max_sessions, ttl_seconds)
+
+    def get(self, session_id: str) -> SessionState | None:
+        return self._cache.get(session_id)
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        self._cache.set(session_id, state)
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+class SqliteSessionBackend(SessionBackend):
+    def __init__(self, path: str, max_sessions: int, ttl_seconds: float) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, session_id: str) -> SessionState | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state, updated_at FROM chat_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds > 0 and row[1] <= time.time() - self.ttl_seconds:
+            return None
+        return SessionState.from_dict(json.loads(row[0]))
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state.as_dict(), ensure_ascii=False), state.updated_at),
+            )
+            if self.ttl_seconds > 0:
+                self._connection.execute(
+                    "DELETE FROM chat_sessions WHERE updated_at <= ?",
+                    (time.time() - self.ttl_seconds,),
+                )
+            self._connection.execute(
+                "DELETE FROM chat_sessions WHERE session_id IN ("
+                "SELECT session_id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()
+        return {"entries": count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def _summarize_turn(user_text: str, assistant_text: str) -> str:
+    sentences = split_sentences(assistant_text)
+    answer = sentences[0] if sentences else assistant_text
+    if len(answer) > SUMMARY_ANSWER_CHARS:
+        answer = answer[:SUMMARY_ANSWER_CHARS].rstrip() + "..."
+    return f"- Visitor asked: {' '.join(user_text.split())}\n  Answer: {answer}"
+
+
+class SessionStore:
+    def __init__(
+        self,
+        backend: SessionBackend,
+        counter: TokenCounter,
+        history_token_budget: int = 800,
+        summary_token_budget: int = 300,
+        max_messages: int = 6,
+    ) -> None:
+        self.backend = backend
+        self.counter = counter
+        self.history_token_budget = max(1, history_token_budget)
+        self.summary_token_budget = max(1, summary_token_budget)
+        self.max_messages = max(2, max_messages)
+        self._lock = threading.Lock()
+        self.compactions = 0
+
+    @staticmethod
+    def valid_session_id(session_id: str | None) -> bool:
+        return bool(session_id) and bool(SESSION_ID_PATTERN.match(session_id))
+
+    def load(self, session_id: str) -> SessionState:
+        return self.backend.get(session_id) or SessionState()
+
+    def _tokens(self, state: SessionState) -> int:
+        return self.counter.count(state.summary_text) + sum(
+            self.counter.count(turn["content"]) for turn in state.turns
+        )
+
+    def _compact(self, state: SessionState) -> None:
+        # Oldest user/assistant pairs are folded into an extractive summary
+        # once the raw turns exceed the token or message budget (the latest
+        # exchange always stays verbatim); the summary itself drops its oldest
+        # lines when it outgrows its own budget.
+        while len(state.turns) > 2 and (
+            len(state.turns) > self.max_messages or self._tokens(state) > self.history_token_budget
+        ):
+            user_turn, assistant_turn = state.turns[0], state.turns[1]
+            state.turns = state.turns[2:]
+            line = _summarize_turn(user_turn["content"], assistant_turn["content"])
+            state.summary = [*state.summary, line]
+            self.compactions += 1
+
+        while len(state.summary) > 1 and self.counter.count(state.summary_text) > self.summary_token_budget:
+            state.summary = state.summary[1:]
+
+    def append(self, session_id: str, user_text: str, assistant_text: str) -> SessionState:
+        with self._lock:
+            state = self.load(session_id)
+            state.turns = [
+                *state.turns,
+                {"role": "user", "content": user_text},
+                {"role": "assistant", "content": assistant_text},
+            ]
+            self._compact(state)
+            state.updated_at = time.time()
+            self.backend.put(session_id, state)
+            return state
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.backend.stats(),
+            "enabled": True,
+            "backend": type(self.backend).__name__,
+            "history_token_budget": self.history_token_budget,
+            "compactions": self.compactions,
+        }
+
+    def close(self) -> None:
+        self.backend.close()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import logging
-from collections import deque
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterator
 from urllib.parse import urljoin, urlparse, urlunparse
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from crawl_frontier import CrawlFrontier, FrontierEntry, load_robots
+from html_extractors import BeautifulSoupExtractor, HtmlExtractor, get_extractor
 
 try:
     from playwright.sync_api import sync_playwright
@@ -46,6 +52,10 @@ class WebsitePage:
     url: str
     title: str
     text: str
+    links: list[str] = field(default_factory=list)
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float | None = None
 
 
 def _normalize_url(url: str) -> str:
@@ -64,28 +74,21 @@ def _should_skip(url: str) -> bool:
     return any(lowered.endswith(extension) for extension in SKIP_EXTENSIONS)
 
 
-def _parse_html(url: str, html: str, base_netloc: str) -> tuple[WebsitePage | None, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
-
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
-        tag.decompose()
+def _parse_html(
+    url: str,
+    html: str,
+    base_netloc: str,
+    extractor: HtmlExtractor | None = None,
+) -> tuple[WebsitePage | None, list[str]]:
+    extracted = (extractor or BeautifulSoupExtractor()).extract(html)
 
-    title = _clean_text(soup.title.get_text(" ", strip=True) if soup.title else "")
-    body_text = soup.get_text(separator="\n")
-    lines = [_clean_text(line) for line in body_text.splitlines()]
+    title = _clean_text(extracted.title)
+    lines = [_clean_text(line) for line in extracted.strings]
     clean_lines = [line for line in lines if line]
 
-    page = None
-    if clean_lines:
-        page = WebsitePage(
-            url=url,
-            title=title or url,
-            text="\n".join(clean_lines),
-        )
-
     links: list[str] = []
-    for link in soup.find_all("a", href=True):
-        absolute_url = _normalize_url(urljoin(url, link["href"]))
+    for href in extracted.hrefs:
+        absolute_url = _normalize_url(urljoin(url, href))
         if not absolute_url.startswith(("http://", "https://")):
             continue
         if not _same_domain(absolute_url, base_netloc):
@@ -94,6 +97,15 @@ def _parse_html(url: str, html: str, base_netloc: str) -> tuple[WebsitePage | No
             continue
         links.append(absolute_url)
 
+    page = None
+    if clean_lines:
+        page = WebsitePage(
+            url=url,
+            title=title or url,
+            text="\n".join(clean_lines),
+            links=links,
+        )
+
     return page, links
 
 
@@ -101,57 +113,205 @@ def _clean_text(value: str) -> str:
     return " ".join(value.split()).strip()
 
 
-def _crawl_with_requests(base_url: str, max_pages: int, timeout_seconds: int = 12) -> list[WebsitePage]:
-    parsed_base = urlparse(base_url)
-    base_netloc = parsed_base.netloc
+def _conditional_headers(previous: WebsitePage | None) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    if previous is None:
+        return headers
+    if previous.etag:
+        headers["If-None-Match"] = previous.etag
+    if previous.last_modified:
+        headers["If-Modified-Since"] = previous.last_modified
+    return headers
+
+
+def _fetch_page(
+    session: requests.Session,
+    url: str,
+    base_netloc: str,
+    timeout_seconds: float,
+    previous: WebsitePage | None,
+    extractor: HtmlExtractor | None = None,
+) -> tuple[WebsitePage | None, list[str]]:
+    logger.info("Scraping %s", url)
+    try:
+        response = session.get(url, timeout=timeout_seconds, headers=_conditional_headers(previous))
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        logger.warning("Failed to fetch %s: %s", url, exc)
+        return None, []
+
+    if response.status_code == 304 and previous is not None:
+        logger.info("Not modified since last crawl: %s", url)
+        return replace(previous, fetched_at=time.time()), previous.links
+
+    content_type = response.headers.get("content-type", "").lower()
+    if "text/html" not in content_type:
+        logger.info("Skipping non-HTML content at %s", url)
+        return None, []
+
+    page, links = _parse_html(url, response.text, base_netloc, extractor)
+    if page is not None:
+        page.etag = response.headers.get("ETag")
+        page.last_modified = response.headers.get("Last-Modified")
+        page.fetched_at = time.time()
+    return page, links
 
+
+def _build_session(pool_size: int) -> requests.Session:
     session = requests.Session()
     session.headers.update({"User-Agent": USER_AGENT})
-
-    visited: set[str] = set()
-    queued = deque([base_url])
-    pages: list[WebsitePage] = []
-
-    while queued and len(visited) < max_pages:
-        current_url = queued.popleft()
-        if current_url in visited:
-            continue
-
-        visited.add(current_url)
-        logger.info("Scraping %s", current_url)
-
-        try:
-            response = session.get(current_url, timeout=timeout_seconds)
-            response.raise_for_status()
-        except requests.RequestException as exc:
-            logger.warning("Failed to fetch %s: %s", current_url, exc)
-            continue
-
-        content_type = response.headers.get("content-type", "").lower()
-        if "text/html" not in content_type:
-            logger.info("Skipping non-HTML content at %s", current_url)
-            continue
-
-        page, discovered_links = _parse_html(current_url, response.text, base_netloc)
-        if page is not None:
-            pages.append(page)
-
-        for discovered_url in discovered_links:
-            if discovered_url not in visited and discovered_url not in queued:
-                queued.append(discovered_url)
-
-    return pages
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _iter_with_requests(
+    base_url: str,
+    max_pages: int,
+    timeout_seconds: int = 12,
+    previous_pages: dict[str, WebsitePage] | None = None,
+    concurrency: int = 8,
+    per_host_limit: int = 4,
+    deadline_seconds: float | None = None,
+    use_sitemap: bool = True,
+    respect_robots: bool = True,
+    extractor: HtmlExtractor | None = None,
+) -> Iterator[tuple[int, WebsitePage]]:
+    previous_pages = previous_pages or {}
+    base_netloc = urlparse(base_url).netloc
+    concurrency = max(1, concurrency)
+    per_host_limit = max(1, per_host_limit)
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+
+    session = _build_session(concurrency)
+    host_limits: dict[str, threading.BoundedSemaphore] = {}
+    host_limits_lock = threading.Lock()
+
+    def fetch(url: str) -> tuple[WebsitePage | None, list[str]]:
+        netloc = urlparse(url).netloc
+        with host_limits_lock:
+            limit = host_limits.setdefault(netloc, threading.BoundedSemaphore(per_host_limit))
+        with limit:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None, []
+            timeout = timeout_seconds
+            if deadline is not None:
+                timeout = max(0.1, min(timeout_seconds, deadline - time.monotonic()))
+            return _fetch_page(session, url, base_netloc, timeout, previous_pages.get(url), extractor)
+
+    frontier = _build_frontier(session, base_url, base_netloc, timeout_seconds, use_sitemap, respect_robots)
+
+    # Pages are fetched as soon as they are discovered, so total time follows
+    # the slowest chain of links rather than the sum of every page. Pages are
+    # yielded as they arrive together with their position in frontier order,
+    # which callers use to rebuild the same page list for the same site.
+    scheduled: dict[str, int] = {}
+    in_flight: dict[Future, FrontierEntry] = {}
+    reused = 0
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crawler")
+
+    def schedule_from_frontier() -> list[tuple[int, WebsitePage]]:
+        nonlocal reused
+        reused_pages: list[tuple[int, WebsitePage]] = []
+        while len(in_flight) < concurrency * 2 and len(scheduled) < max_pages:
+            entry = frontier.pop()
+            if entry is None:
+                break
+            scheduled[entry.url] = len(scheduled)
+            previous = previous_pages.get(entry.url)
+            if _unchanged_since_last_crawl(entry, previous):
+                # The sitemap says this page has not changed since it was last
+                # fetched, so reuse it without a request.
+                reused += 1
+                reused_pages.append((scheduled[entry.url], previous))
+                for link in previous.links:
+                    frontier.add(link, depth=entry.depth + 1)
+                continue
+            in_flight[executor.submit(fetch, entry.url)] = entry
+        return reused_pages
+
+    try:
+        yield from schedule_from_frontier()
+        while in_flight:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                logger.warning(
+                    "Crawl deadline reached with %s request(s) in flight. Returning what was collected.",
+                    len(in_flight),
+                )
+                break
+            done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+            completed: list[tuple[int, WebsitePage]] = []
+            for future in done:
+                entry = in_flight.pop(future)
+                page, discovered_links = future.result()
+                if page is not None:
+                    completed.append((scheduled[entry.url], page))
+                for discovered_url in discovered_links:
+                    frontier.add(discovered_url, depth=entry.depth + 1)
+            completed.extend(schedule_from_frontier())
+            yield from completed
+    finally:
+        # Requests still running past the deadline finish in the background;
+        # only an idle session is closed.
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not in_flight:
+            session.close()
+
+    if reused or frontier.blocked_by_robots:
+        logger.info(
+            "Crawl reused %s page(s) unchanged per sitemap lastmod; robots.txt blocked %s URL(s).",
+            reused,
+            frontier.blocked_by_robots,
+        )
 
 
-def _crawl_with_playwright(base_url: str, max_pages: int, timeout_seconds: int = 20) -> list[WebsitePage]:
+def _unchanged_since_last_crawl(entry: FrontierEntry, previous: WebsitePage | None) -> bool:
+    return (
+        previous is not None
+        and entry.lastmod is not None
+        and previous.fetched_at is not None
+        and entry.lastmod <= previous.fetched_at
+    )
+
+
+def _build_frontier(
+    session: requests.Session,
+    base_url: str,
+    base_netloc: str,
+    timeout_seconds: float,
+    use_sitemap: bool,
+    respect_robots: bool,
+) -> CrawlFrontier:
+    robots = load_robots(session, base_url, timeout_seconds) if respect_robots else None
+    frontier = CrawlFrontier(
+        normalize=_normalize_url,
+        accept=lambda url: (
+            url.startswith(("http://", "https://")) and _same_domain(url, base_netloc) and not _should_skip(url)
+        ),
+        robots=robots,
+    )
+    frontier.seed(session, base_url, timeout_seconds, use_sitemap=use_sitemap)
+    return frontier
+
+
+def _iter_with_playwright(
+    base_url: str,
+    max_pages: int,
+    timeout_seconds: int = 20,
+    use_sitemap: bool = True,
+    respect_robots: bool = True,
+    extractor: HtmlExtractor | None = None,
+) -> Iterator[tuple[int, WebsitePage]]:
     if sync_playwright is None:
         raise RuntimeError("Playwright is not available in this environment.")
 
-    parsed_base = urlparse(base_url)
-    base_netloc = parsed_base.netloc
-    visited: set[str] = set()
-    queued = deque([base_url])
-    pages: list[WebsitePage] = []
+    base_netloc = urlparse(base_url).netloc
+    with _build_session(1) as session:
+        frontier = _build_frontier(session, base_url, base_netloc, timeout_seconds, use_sitemap, respect_robots)
+    visited = 0
 
     with sync_playwright() as playwright:
         browser = playwright.chromium.launch(headless=True)
@@ -159,12 +319,12 @@ def _crawl_with_playwright(base_url: str, max_pages: int, timeout_seconds: int =
         page_handle.set_default_navigation_timeout(timeout_seconds * 1000)
 
         try:
-            while queued and len(visited) < max_pages:
-                current_url = queued.popleft()
-                if current_url in visited:
-                    continue
-
-                visited.add(current_url)
+            while visited < max_pages:
+                entry = frontier.pop()
+                if entry is None:
+                    break
+                visited += 1
+                current_url = entry.url
                 logger.info("Scraping with Playwright %s", current_url)
 
                 try:
@@ -174,37 +334,78 @@ def _crawl_with_playwright(base_url: str, max_pages: int, timeout_seconds: int =
                     logger.warning("Playwright failed to fetch %s: %s", current_url, exc)
                     continue
 
-                parsed_page, discovered_links = _parse_html(current_url, html, base_netloc)
+                parsed_page, discovered_links = _parse_html(current_url, html, base_netloc, extractor)
                 if parsed_page is not None:
-                    pages.append(parsed_page)
+                    yield visited - 1, parsed_page
 
                 for discovered_url in discovered_links:
-                    if discovered_url not in visited and discovered_url not in queued:
-                        queued.append(discovered_url)
+                    frontier.add(discovered_url, depth=entry.depth + 1)
         finally:
             browser.close()
 
-    return pages
 
-
-def crawl_website_pages(base_url: str, max_pages: int = 50, use_playwright: bool = False) -> list[WebsitePage]:
+def iter_website_pages(
+    base_url: str,
+    max_pages: int = 50,
+    use_playwright: bool = False,
+    previous_pages: dict[str, WebsitePage] | None = None,
+    concurrency: int = 8,
+    per_host_limit: int = 4,
+    deadline_seconds: float | None = None,
+    use_sitemap: bool = True,
+    respect_robots: bool = True,
+    html_extractor: str = "auto",
+) -> Iterator[tuple[int, WebsitePage]]:
     if not base_url:
-        return []
+        return
+
+    extractor = get_extractor(html_extractor)
 
     normalized_base_url = base_url if base_url.startswith(("http://", "https://")) else f"https://{base_url}"
     normalized_base_url = _normalize_url(normalized_base_url)
 
+    yielded: set[str] = set()
     if use_playwright:
         try:
-            pages = _crawl_with_playwright(normalized_base_url, max_pages=max_pages)
-            logger.info("Playwright crawl collected %s page(s).", len(pages))
-            return pages
+            for position, page in _iter_with_playwright(
+                normalized_base_url,
+                max_pages=max_pages,
+                use_sitemap=use_sitemap,
+                respect_robots=respect_robots,
+                extractor=extractor,
+            ):
+                yielded.add(page.url)
+                yield position, page
+            logger.info("Playwright crawl collected %s page(s).", len(yielded))
+            return
         except Exception as exc:
             logger.warning("Playwright crawl failed, falling back to requests: %s", exc)
 
-    pages = _crawl_with_requests(normalized_base_url, max_pages=max_pages)
-    logger.info("Requests crawl collected %s page(s).", len(pages))
-    return pages
+    # Pages the browser already produced are not yielded twice; the requests
+    # crawl is ordered after them.
+    offset = max_pages if yielded else 0
+    collected = 0
+    for position, page in _iter_with_requests(
+        normalized_base_url,
+        max_pages=max_pages,
+        previous_pages=previous_pages,
+        concurrency=concurrency,
+        per_host_limit=per_host_limit,
+        deadline_seconds=deadline_seconds,
+        use_sitemap=use_sitemap,
+        respect_robots=respect_robots,
+        extractor=extractor,
+    ):
+        if page.url in yielded:
+            continue
+        collected += 1
+        yield offset + position, page
+    logger.info("Requests crawl collected %s page(s).", collected)
+
+
+def crawl_website_pages(base_url: str, max_pages: int = 50, **options: Any) -> list[WebsitePage]:
+    results = dict(iter_website_pages(base_url, max_pages=max_pages, **options))
+    return [results[position] for position in sorted(results)]
 
 
 def get_all_pages_from_website(base_url: str, max_pages: int = 50) -> str:
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Iterator
+
+from langchain_core.documents import Document
+
+
+LABEL_FIELDS = ("title", "name", "program", "role")
+
+
+def _compact_text(value: str | None) -> str:
+    return " ".join((value or "").split())
+
+
+def _label(tag: str) -> str:
+    return tag.replace("_", " ").strip()
+
+
+def _render(node: ET.Element, depth: int = 0) -> list[str]:
+    content = _compact_text(node.text)
+    indent = "  " * depth
+    lines = [f"{indent}{_label(node.tag)}: {content}" if content else f"{indent}{_label(node.tag)}:"]
+    for child in node:
+        lines.extend(_render(child, depth + 1))
+    return lines
+
+
+def _unit_name(node: ET.Element) -> str:
+    company = _compact_text(node.findtext("company"))
+    for tag in LABEL_FIELDS:
+        value = _compact_text(node.findtext(tag))
+        if value:
+            return f"{value} at {company}" if tag == "title" and company else value
+    return ""
+
+
+def _pack(header: str, lines: list[str], max_chars: int) -> list[str]:
+    # Split only between child lines and repeat the header, so every piece
+    # still says which record it belongs to.
+    pieces: list[str] = []
+    current: list[str] = []
+    size = len(header)
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            pieces.append("\n".join([header, *current]))
+            current, size = [], len(header)
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join([header, *current]))
+    return pieces
+
+
+class PortfolioXmlChunker:
+    def __init__(self, max_chars: int = 900) -> None:
+        self.max_chars = max(200, max_chars)
+
+    def _documents(self, section: str, path: list[str], name: str, lines: list[str]) -> list[Document]:
+        header = " > ".join(_label(tag).title() for tag in path)
+        if name:
+            header = f"{header} ({name})"
+        title = f"Portfolio XML - {_label(section).title()}"
+        return [
+            Document(
+                page_content=text,
+                metadata={
+                    "source_type": "portfolio_xml",
+                    "source_id": f"portfolio:{section}",
+                    "title": f"{title} - {name}" if name else title,
+                    "url": None,
+                    "section_path": "/".join(path),
+                },
+            )
+            for text in _pack(header, lines, self.max_chars)
+        ]
+
+    def iter_chunks(self, xml_path: str) -> Iterator[Document]:
+        # Records (job, project, degree, ...) become one chunk each. Plain
+        # fields directly under a section (personal details, skill groups) are
+        # packed together, never split mid-field.
+        stack: list[ET.Element] = []
+        pending: list[str] = []
+
+        for event, element in ET.iterparse(xml_path, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 2:
+                section = stack[1]
+                if len(element):
+                    yield from self._documents(
+                        section.tag,
+                        [section.tag, element.tag],
+                        _unit_name(element),
+                        [line for child in element for line in _render(child)],
+                    )
+                else:
+                    line = _render(element)[0]
+                    if not line.endswith(":"):
+                        pending.append(line)
+                section.remove(element)
+            elif depth == 1:
+                content = _compact_text(element.text)
+                if content:
+                    pending.insert(0, content)
+                if pending:
+                    yield from self._documents(element.tag, [element.tag], "", pending)
+                pending = []
+                stack[0].remove(element)
+
+    def chunk(self, xml_path: str) -> list[Document]:
+        return list(self.iter_chunks(xml_path))